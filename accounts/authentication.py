@@ -0,0 +1,107 @@
+"""
+JWT authentication without a user query on every request.
+
+``CachedJWTAuthentication`` keeps the user rows it loads in process memory for
+``AUTH_USER_CACHE_TTL`` seconds, at most ``AUTH_USER_CACHE_SIZE`` of them.
+Saving or deleting a user (password change, deactivation) drops its entry in
+the process that made the change; other workers pick the change up when their
+entry expires.
+
+``StatelessReadJWTAuthentication`` goes further for read-only endpoints: safe
+requests get a ``TokenUser`` built from the verified token's claims, so they
+never touch the user table. Writes still load the real user.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+# user id -> (expiry, user), oldest entry first
+_users = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached_user(user_id):
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is not None and entry[0] < time.monotonic():
+            del _users[user_id]
+            entry = None
+    return entry[1] if entry is not None else None
+
+
+def cache_user(user):
+    ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+    now = time.monotonic()
+    with _lock:
+        _users.pop(user.pk, None)
+        _users[user.pk] = (now + ttl, user)
+        # Every entry lives for the same TTL, so the oldest expire first
+        limit = getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+        while len(_users) > limit or next(iter(_users.values()))[0] < now:
+            _users.popitem(last=False)
+
+
+def forget_user(user_id):
+    with _lock:
+        _users.pop(user_id, None)
+
+
+def clear_user_cache():
+    with _lock:
+        _users.clear()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(copy.copy(user))
+            return user
+
+        # Same checks as a fresh lookup, against the cached row
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        # Requests may modify their user; the cached row must stay as loaded
+        return copy.copy(user)
+
+
+class StatelessReadJWTAuthentication(CachedJWTAuthentication):
+    """Token-claims user for safe methods, cached user lookup otherwise"""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise AuthenticationFailed('Token contained no recognizable user identification', code='bad_token')
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
@@ -0,0 +1,76 @@
+"""
+Password hashing off the request path.
+
+PBKDF2 is deliberately slow, so a burst of logins or registrations can take
+every CPU a worker has. Hashes run on a small pool of ``PASSWORD_HASH_WORKERS``
+threads (hashlib releases the GIL while it hashes), and at most
+``PASSWORD_HASH_QUEUE`` may be waiting or running at once; beyond that callers
+get ``HashingBusy`` straight away instead of piling up behind the pool.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+User = get_user_model()
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _get_pool():
+    global _executor, _slots
+    with _init_lock:
+        if _executor is None:
+            workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+            _slots = threading.BoundedSemaphore(getattr(settings, 'PASSWORD_HASH_QUEUE', 16))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor, _slots
+
+
+def run_hasher(func, *args):
+    """Run ``func(*args)`` on the hashing pool and wait for its result"""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy('Too many password operations in progress')
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda f: slots.release())
+    return future.result()
+
+
+def hash_password(password):
+    return run_hasher(make_password, password)
+
+
+def needs_rehash(encoded):
+    preferred = get_hasher('default')
+    return identify_hasher(encoded).algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def authenticate_credentials(email, password):
+    """The active user with these credentials, or ``None``.
+
+    Same outcome as ``authenticate()`` with the model backend, but only the
+    hash runs on the pool; database access stays on the request thread.
+    """
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        hash_password(password)
+        return None
+    if not run_hasher(check_password, password, user.password):
+        return None
+    if needs_rehash(user.password):
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return user if user.is_active else None
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
+from .hashing import hash_password
 
 User = get_user_model()
 
@@ -20,11 +21,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
-        user = User.objects.create_user(
-            email=validated_data['email'],
+        # Hashed on the bounded pool rather than by create_user on this thread
+        user = User(
+            email=User.objects.normalize_email(validated_data['email']),
             username=validated_data['username'],
-            password=validated_data['password'],
+            password=hash_password(validated_data['password']),
         )
+        user.save()
         return user
 
 class UserLoginSerializer(serializers.Serializer):
@@ -1,9 +1,12 @@
 import pytest
+import threading
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from accounts import hashing
+from accounts.throttling import AuthEmailThrottle, AuthIPThrottle
 
 User = get_user_model()
 
@@ -33,6 +36,20 @@ def test_register_user(api_client):
     response = api_client.post(url, payload)
     assert response.status_code == status.HTTP_201_CREATED
     assert response.data["status"] == "success"
+    user = User.objects.get(email="newuser@example.com")
+    # Hashed on the pool with the default hasher, never stored in clear
+    assert user.password.startswith("pbkdf2_sha256$")
+    assert user.check_password("NewPass@123")
+
+@pytest.mark.django_db
+def test_register_when_hashing_pool_is_full(api_client, monkeypatch):
+    """Registrations are turned away instead of queueing behind a full hashing pool"""
+    hashing._get_pool()
+    monkeypatch.setattr(hashing, "_slots", threading.Semaphore(0))
+    payload = {"email": "newuser@example.com", "username": "newuser", "password": "NewPass@123", "password2": "NewPass@123"}
+    response = api_client.post(reverse("register"), payload)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert not User.objects.exists()
 
 @pytest.mark.django_db
 def test_login_user(api_client, create_user):
@@ -69,4 +86,56 @@ def test_logout_user(api_client, create_user):
     url = reverse("logout")
     response = api_client.post(url, {"refresh_token": str(refresh)})
     assert response.status_code == status.HTTP_200_OK
-    assert response.data["status"] == "success"
\ No newline at end of file
+    assert response.data["status"] == "success"
+
+@pytest.mark.django_db
+def test_login_throttled_per_email(api_client, create_user, monkeypatch):
+    """Each email gets its own token bucket"""
+    monkeypatch.setitem(AuthEmailThrottle.THROTTLE_RATES, "auth_email", "2/min")
+    user = create_user()
+    url = reverse("login")
+    for _ in range(2):
+        assert api_client.post(url, {"email": user.email, "password": "Wrong@123"}).status_code == 400
+    response = api_client.post(url, {"email": user.email, "password": "Test@123"})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response["Retry-After"]) > 0
+    assert api_client.post(url, {"email": "other@example.com", "password": "Test@123"}).status_code == 400
+
+@pytest.mark.django_db
+def test_login_when_hashing_pool_is_full(api_client, create_user, monkeypatch):
+    """Logins are turned away instead of queueing behind a full hashing pool"""
+    user = create_user()
+    hashing._get_pool()
+    monkeypatch.setattr(hashing, "_slots", threading.Semaphore(0))
+    response = api_client.post(reverse("login"), {"email": user.email, "password": "Test@123"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response["Retry-After"] == "1"
+
+@pytest.mark.django_db
+def test_login_throttled_per_ip(api_client, create_user, monkeypatch):
+    """Addresses made up in X-Forwarded-For share the bucket of the real client"""
+    monkeypatch.setitem(AuthIPThrottle.THROTTLE_RATES, "auth_ip", "2/min")
+    user = create_user()
+    url = reverse("login")
+    for i in range(2):
+        response = api_client.post(url, {"email": user.email, "password": "Test@123"}, HTTP_X_FORWARDED_FOR=f"198.51.100.{i}")
+        assert response.status_code == status.HTTP_200_OK
+    response = api_client.post(url, {"email": user.email, "password": "Test@123"}, HTTP_X_FORWARDED_FOR="198.51.100.9")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    other = APIClient(REMOTE_ADDR="203.0.113.5")
+    assert other.post(url, {"email": user.email, "password": "Test@123"}).status_code == status.HTTP_200_OK
+
+@pytest.mark.django_db
+def test_ip_throttle_behind_trusted_proxy(api_client, create_user, monkeypatch, settings):
+    """Behind one trusted proxy only the entry it added names the client"""
+    settings.TRUSTED_PROXY_COUNT = 1
+    monkeypatch.setitem(AuthIPThrottle.THROTTLE_RATES, "auth_ip", "2/min")
+    user = create_user()
+    url = reverse("login")
+    for i in range(2):
+        forwarded = f"198.51.100.{i}, 203.0.113.7"
+        assert api_client.post(url, {"email": user.email, "password": "Test@123"}, HTTP_X_FORWARDED_FOR=forwarded).status_code == 200
+    response = api_client.post(url, {"email": user.email, "password": "Test@123"}, HTTP_X_FORWARDED_FOR="198.51.100.9, 203.0.113.7")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    response = api_client.post(url, {"email": user.email, "password": "Test@123"}, HTTP_X_FORWARDED_FOR="203.0.113.8")
+    assert response.status_code == status.HTTP_200_OK
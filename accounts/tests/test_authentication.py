@@ -0,0 +1,63 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts import authentication
+from accounts.authentication import cache_user, cached_user, clear_user_cache
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    clear_user_cache()
+    yield
+    clear_user_cache()
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(email="test@example.com", username="testuser", password="Test@123")
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+def user_queries(captured):
+    return [q for q in captured if 'FROM "accounts_user"' in q['sql']]
+
+def test_user_row_is_reused_between_requests(api_client):
+    with CaptureQueriesContext(connection) as first:
+        assert api_client.post("/auth/logout/", {}).status_code == 400
+    with CaptureQueriesContext(connection) as second:
+        assert api_client.post("/auth/logout/", {}).status_code == 400
+    assert len(user_queries(first.captured_queries)) == 1
+    assert user_queries(second.captured_queries) == []
+
+def test_deactivation_drops_cached_user(api_client, user):
+    assert api_client.post("/auth/logout/", {}).status_code == 400
+    user.is_active = False
+    user.save()
+    assert api_client.post("/auth/logout/", {}).status_code == 401
+
+def test_reads_use_token_claims(api_client, user):
+    with CaptureQueriesContext(connection) as captured:
+        assert api_client.get("/api/videos/").status_code == 200
+    assert user_queries(captured.captured_queries) == []
+
+def test_user_cache_drops_expired_and_oldest_entries(settings, monkeypatch):
+    settings.AUTH_USER_CACHE_SIZE = 2
+    now = [100.0]
+    monkeypatch.setattr(authentication.time, 'monotonic', lambda: now[0])
+    users = [User(pk=pk, email=f'{pk}@example.com') for pk in range(1, 4)]
+    for user in users:
+        cache_user(user)
+    assert list(authentication._users) == [2, 3]
+
+    now[0] += settings.AUTH_USER_CACHE_TTL + 1
+    assert cached_user(2) is None
+    assert list(authentication._users) == [3]
+    cache_user(users[0])
+    assert list(authentication._users) == [1]
@@ -0,0 +1,58 @@
+"""
+Token-bucket throttles for the login and registration endpoints.
+
+A rate such as ``5/min`` is a bucket of 5 requests that refills at 5 per
+minute, so clients may burst up to the bucket size but not sustain more than
+the rate. Buckets live in the default cache (shared when it is Redis).
+"""
+from rest_framework.throttling import SimpleRateThrottle
+from video_app.view_counts import client_address
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, self.now))
+        refill = (self.now - updated) * self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + refill)
+        if self.tokens < 1:
+            return self.throttle_failure()
+        self.cache.set(self.key, (self.tokens - 1, self.now), self.duration)
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Per-address bucket.
+
+    DRF's ``get_ident`` trusts the whole ``X-Forwarded-For`` header unless
+    ``NUM_PROXIES`` is set, so a client could pick a new bucket per request;
+    ``client_address`` only believes the entry added by ``TRUSTED_PROXY_COUNT``
+    proxies.
+    """
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': client_address(request)}
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    """Per-account bucket, so spreading attempts over many addresses does not help"""
+    scope = 'auth_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': str(email).strip().lower()}
@@ -4,8 +4,9 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .hashing import HashingBusy, authenticate_credentials
+from .throttling import AuthEmailThrottle, AuthIPThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
 import logging
 from rest_framework import serializers
 
@@ -13,9 +14,18 @@ logger = logging.getLogger('django')
 User = get_user_model()
 
 
+def busy_response():
+    """Answer for requests turned away because the password hashing pool is full"""
+    return Response({
+        'status': 'error',
+        'message': 'Server is busy, please try again shortly'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
     serializer_class = UserRegistrationSerializer
     
     def create(self, request, *args, **kwargs):
@@ -35,6 +45,9 @@ class RegisterView(generics.CreateAPIView):
                 }
             }
             return Response(response_data, status=status.HTTP_201_CREATED)
+
+        except HashingBusy:
+            return busy_response()
             
         except serializers.ValidationError as e:
             # Log validation errors in detail
@@ -57,6 +70,7 @@ class RegisterView(generics.CreateAPIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
 
     def post(self, request):
         try:
@@ -64,7 +78,7 @@ class LoginView(APIView):
             if serializer.is_valid(raise_exception=True):
                 email = serializer.validated_data['email']
                 password = serializer.validated_data['password']
-                user = authenticate(email=email,password=password)
+                user = authenticate_credentials(email, password)
 
                 if user is None:
                     return Response({'status':'error','message':'Invalid email or password'}, status=status.HTTP_400_BAD_REQUEST)
@@ -87,6 +101,9 @@ class LoginView(APIView):
                 'user': UserSerializer(user).data
             }, status=status.HTTP_200_OK)
 
+        except HashingBusy:
+            return busy_response()
+
         except Exception as e:
             print(str(e))
             return Response({
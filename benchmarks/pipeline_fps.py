@@ -0,0 +1,115 @@
+"""
+Per-stage throughput of the stream encode pipeline.
+
+Decodes a video as fast as possible and reports frames per second for
+capture (decode), encode (resize + JPEG) and publish, first with the old
+serial loop and then with the pipelined worker pool. Compare the pipelined
+publish fps with the source fps to see whether a stream keeps up in real
+time on this machine.
+
+Usage:
+    python benchmarks/pipeline_fps.py path/to/video.mp4 --frames 600 \
+        --profile high --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'video_streaming.settings')
+
+import cv2  # noqa: E402
+import django  # noqa: E402
+
+django.setup()
+
+from video_app.streaming import EncodePipeline, encode_frame  # noqa: E402
+
+
+def read_frames(cap, count):
+    """Yield up to `count` decoded frames with their decode time, looping the video"""
+    for _ in range(count):
+        started = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = cap.read()
+            if not ret:
+                return
+        yield frame, time.perf_counter() - started
+
+
+def run_serial(path, frames, profile):
+    cap = cv2.VideoCapture(path)
+    decode = encode = 0.0
+    count = 0
+    started = time.perf_counter()
+    for frame, decode_seconds in read_frames(cap, frames):
+        decode += decode_seconds
+        t = time.perf_counter()
+        encode_frame(frame, profile)
+        encode += time.perf_counter() - t
+        count += 1
+    total = time.perf_counter() - started
+    cap.release()
+    return {
+        'capture': count / decode if decode else 0.0,
+        'encode': count / encode if encode else 0.0,
+        'publish': count / total if total else 0.0,
+    }
+
+
+def run_pipelined(path, frames, profile, workers):
+    cap = cv2.VideoCapture(path)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    published = []
+    pipeline = EncodePipeline(profile, published.append, max_pending=2 * workers, pool=pool)
+    started = time.perf_counter()
+    for frame, decode_seconds in read_frames(cap, frames):
+        pipeline.submit(frame, decode_seconds)
+    pipeline.close()
+    total = time.perf_counter() - started
+    pool.shutdown()
+    cap.release()
+    stats = pipeline.stats
+    return {
+        'capture': stats['capture'].frames / stats['capture'].busy if stats['capture'].busy else 0.0,
+        # Aggregate encode throughput across all workers
+        'encode': workers * stats['encode'].frames / stats['encode'].busy if stats['encode'].busy else 0.0,
+        'publish': len(published) / total if total else 0.0,
+    }
+
+
+def report(label, result, source_fps):
+    realtime = 'yes' if result['publish'] >= source_fps else 'no'
+    print(
+        f"{label:<14} capture={result['capture']:8.1f} fps  encode={result['encode']:8.1f} fps  "
+        f"publish={result['publish']:8.1f} fps  real-time={realtime}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--profile', default='high')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 4])
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        parser.error(f"cannot open {args.video}")
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    print(f"source: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+          f"@ {source_fps:.2f} fps, profile={args.profile}, frames={args.frames}")
+    cap.release()
+
+    report('serial', run_serial(args.video, args.frames, args.profile), source_fps)
+    for workers in sorted(set(args.workers)):
+        report(f'pipelined x{workers}', run_pipelined(args.video, args.frames, args.profile, workers), source_fps)
+
+
+if __name__ == '__main__':
+    main()
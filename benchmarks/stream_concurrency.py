@@ -0,0 +1,106 @@
+"""
+Load benchmark for the MJPEG stream endpoints.
+
+Opens many concurrent viewers against the sync (`/stream/`) and async
+(`/stream/async/`) endpoints of a running server and reports how many of
+them actually receive frames, which is the number of viewers one worker
+can hold at a time.
+
+Usage:
+    python benchmarks/stream_concurrency.py --base-url http://127.0.0.1:8000 \
+        --video-id 1 --viewers 50 200 1000 --duration 10
+
+Run it once against `gunicorn video_streaming.wsgi:application` (sync
+workers) and once against the ASGI server from the Procfile, both with a
+single worker (`--workers 1`), to compare the two paths.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+BOUNDARY = b'--frame'
+
+
+async def viewer(host, port, path, duration, stats):
+    """Hold one stream open for `duration` seconds and count frames"""
+    frames = 0
+    first_frame_at = None
+    started = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=duration)
+    except Exception:
+        stats['refused'] += 1
+        return
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        deadline = started + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            count = chunk.count(BOUNDARY)
+            if count and first_frame_at is None:
+                first_frame_at = time.monotonic() - started
+            frames += count
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+    if frames:
+        stats['served'] += 1
+        stats['frames'] += frames
+        stats['first_frame'].append(first_frame_at)
+    else:
+        stats['starved'] += 1
+
+
+async def run(base_url, path, viewers, duration):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    stats = {'served': 0, 'starved': 0, 'refused': 0, 'frames': 0, 'first_frame': []}
+    await asyncio.gather(*(viewer(host, port, path, duration, stats) for _ in range(viewers)))
+    return stats
+
+
+def report(label, viewers, duration, stats):
+    first = sorted(stats['first_frame'])
+    p50 = first[len(first) // 2] if first else float('nan')
+    fps = stats['frames'] / stats['served'] / duration if stats['served'] else 0.0
+    print(
+        f"{label:<6} viewers={viewers:<5} served={stats['served']:<5} "
+        f"starved={stats['starved']:<5} refused={stats['refused']:<5} "
+        f"fps/viewer={fps:6.1f} first-frame p50={p50:.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--video-id', type=int, required=True)
+    parser.add_argument('--viewers', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', choices=['sync', 'async', 'both'], default='both')
+    args = parser.parse_args()
+
+    paths = {
+        'sync': f'/api/videos/{args.video_id}/stream/',
+        'async': f'/api/videos/{args.video_id}/stream/async/',
+    }
+    labels = ['sync', 'async'] if args.path == 'both' else [args.path]
+    for count in args.viewers:
+        for label in labels:
+            stats = asyncio.run(run(args.base_url, paths[label], count, args.duration))
+            report(label, count, args.duration, stats)
+
+
+if __name__ == '__main__':
+    main()
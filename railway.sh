@@ -5,4 +5,4 @@ python manage.py migrate
 
 # Start the application
 PORT=${PORT:-8000}
-gunicorn video_streaming.wsgi:application --bind 0.0.0.0:$PORT
\ No newline at end of file
+gunicorn video_streaming.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Per-viewer backpressure for MJPEG streams.
+
+The time between a frame generator yielding a chunk and being resumed is how
+long that viewer takes to receive one, as long as the server writes each chunk
+before asking for the next: a WSGI worker iterating ``mjpeg_frames``, or
+Django's ASGI handler awaiting the server's flow-controlled ``send`` between
+chunks of ``mjpeg_frames_async``. Under ASGI a synchronous iterator is drained
+into memory first and its timings say nothing, so ``frame_iterator`` only
+hands each server the generator it can pace. ``ViewerPacer`` keeps a moving
+average of the delivery time and, once it exceeds the viewer's frame period,
+reacts in escalating steps:
+
+1. read the newest frame instead of the backlog (``catch_up``),
+2. halve the frames sent to this viewer, down to ``STREAM_MIN_VIEWER_FPS``,
+3. ask for the next lower profile once the rate is at that floor.
+
+Fast delivery doubles the rate again up to the source fps. Profiles are never
+raised: a viewer that needed a smaller one is likely to need it again.
+"""
+import time
+from django.conf import settings
+
+# Weight of the newest delivery time in the moving average
+SMOOTHING = 0.3
+# Consecutive slow frames before stepping down; fast periods (in seconds) before stepping up
+SLOW_FRAMES = 3
+RECOVERY_SECONDS = 2.0
+# Delivering a frame in under this share of the next-higher rate's period counts as fast
+FAST_RATIO = 0.5
+
+
+class ViewerPacer:
+    def __init__(self, source_fps, min_fps=None):
+        self.source_fps = source_fps or 30
+        if min_fps is None:
+            min_fps = getattr(settings, 'STREAM_MIN_VIEWER_FPS', 5)
+        self.min_fps = min(min_fps, self.source_fps)
+        self.fps = self.source_fps
+        self.delivery = None # Moving average of seconds to deliver one frame
+        self.skipped = 0
+        self._slow = 0
+        self._fast = 0
+        self._sent_at = None
+
+    @property
+    def lagging(self):
+        """Whether frames are published faster than this viewer receives them"""
+        return self.delivery is not None and self.delivery > 1 / self.source_fps
+
+    def catch_up(self, cursor, latest_seq):
+        """Cursor to read from next: just before the newest frame when lagging"""
+        if cursor is None or latest_seq is None or not self.lagging or latest_seq - cursor <= 1:
+            return cursor
+        self.skipped += latest_seq - 1 - cursor
+        return latest_seq - 1
+
+    def due(self, now=None):
+        """Whether the next frame should be sent at this viewer's current rate"""
+        if self._sent_at is None or self.fps >= self.source_fps:
+            return True
+        now = time.monotonic() if now is None else now
+        # Frames arrive a source period apart; allow half of one for jitter
+        if now - self._sent_at >= 1 / self.fps - 0.5 / self.source_fps:
+            return True
+        self.skipped += 1
+        return False
+
+    def sending(self, now=None):
+        self._sent_at = time.monotonic() if now is None else now
+
+    def delivered(self, now=None):
+        """Record that the last frame sent was delivered.
+
+        Returns ``True`` when the viewer is still too slow at the lowest frame
+        rate and should move to a lower profile.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._sent_at
+        if self.delivery is None:
+            self.delivery = elapsed
+        else:
+            self.delivery = SMOOTHING * elapsed + (1 - SMOOTHING) * self.delivery
+
+        if self.delivery > 1 / self.fps:
+            self._fast = 0
+            self._slow += 1
+            if self._slow < SLOW_FRAMES:
+                return False
+            self._slow = 0
+            if self.fps > self.min_fps:
+                self.fps = max(self.fps / 2, self.min_fps)
+                return False
+            return True
+
+        self._slow = 0
+        if self.fps < self.source_fps and self.delivery < FAST_RATIO / (2 * self.fps):
+            self._fast += 1
+            if self._fast >= RECOVERY_SECONDS * self.fps:
+                self._fast = 0
+                self.fps = min(self.fps * 2, self.source_fps)
+        else:
+            self._fast = 0
+        return False
@@ -0,0 +1,85 @@
+"""
+Response cache for the catalog endpoints (list, search, my_videos).
+
+Entries are keyed on the query string, host and, where results depend on the
+user, the user id, and carry an ETag so clients can revalidate with
+``If-None-Match``. Every key embeds a generation number that is bumped when a
+``Video`` is saved or deleted, which drops all entries at once without having
+to find them. Writes through ``QuerySet.update`` (view counts, processing
+state) are picked up when the entry expires after ``CATALOG_CACHE_TIMEOUT``.
+"""
+import hashlib
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+from .models import Video
+
+GENERATION_KEY = 'video-catalog:generation'
+
+
+def catalog_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate_catalog():
+    """Make every cached catalog response stale"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def invalidate_on_video_change(sender, **kwargs):
+    invalidate_catalog()
+
+
+def catalog_key(request, name, per_user):
+    scope = f"user:{request.user.pk}" if per_user else 'all'
+    query = json.dumps(sorted(request.query_params.lists()))
+    digest = hashlib.sha1(f"{request.get_host()}|{scope}|{query}".encode()).hexdigest()
+    return f"video-catalog:{catalog_generation()}:{name}:{digest}"
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def cache_catalog_response(per_user=False):
+    """Cache a viewset action's 200 responses and answer revalidations with 304"""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = catalog_key(request, view_method.__name__, per_user)
+            cached = cache.get(key)
+            if cached is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                body = json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True)
+                etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+                # Plain JSON data pickles cheaply, unlike DRF's ReturnList/ReturnDict
+                cached = (etag, json.loads(body))
+                cache.set(key, cached, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60))
+            etag, data = cached
+
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(data)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
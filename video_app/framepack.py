@@ -0,0 +1,216 @@
+"""
+Pre-encoded MJPEG frame packs.
+
+A pack is built once per video and stream profile: the JPEG frames the live
+streamer would produce, concatenated, followed by a compact index of
+``(offset, length, timestamp)`` entries. Packs are memory-mapped on read, so
+serving a pack needs no OpenCV work in the request path.
+
+File layout (little endian)::
+
+    header: magic, version, fps, frame count, index offset
+    frames: concatenated JPEG bytes
+    index:  frame count * (offset u64, length u32, timestamp seconds f64)
+"""
+import asyncio
+import bisect
+import cv2
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from django.conf import settings
+from .streaming import DEFAULT_STREAM_PROFILE, FrameClock, encode_frame
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'VSPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHdIQ')
+INDEX_ENTRY = struct.Struct('<QId')
+
+_open_packs = {}
+_open_packs_lock = threading.Lock()
+
+
+def pack_path(video_id, profile=DEFAULT_STREAM_PROFILE):
+    return os.path.join(settings.MEDIA_ROOT, 'framepacks', str(video_id), f"{profile}.pack")
+
+
+def build_frame_pack(video_path, output_path, profile=DEFAULT_STREAM_PROFILE):
+    """Decode and encode every frame of a video once and write it as a pack"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Failed to open video: {video_path}")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    index = []
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, fps, 0, 0))
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if not timestamp and index:
+                    timestamp = len(index) / fps
+                data = encode_frame(frame, profile)
+                index.append((f.tell(), len(data), timestamp))
+                f.write(data)
+
+            index_offset = f.tell()
+            for entry in index:
+                f.write(INDEX_ENTRY.pack(*entry))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, fps, len(index), index_offset))
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        cap.release()
+
+    logger.info(f"Built frame pack {output_path}: {len(index)} frames")
+    return len(index)
+
+
+class FramePack:
+    """Read-only, memory-mapped view of a frame pack.
+
+    Packs from ``open_frame_pack`` are reference counted: each caller holds
+    one reference and gives it back with ``release()``. A pack replaced by a
+    rebuilt file is retired and unmapped once its last holder releases it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._refs = 0
+        self._retired = False
+        self._refs_lock = threading.Lock()
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.fps, self.frame_count, index_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a frame pack: {path}")
+        self._index_offset = index_offset
+        self.timestamps = [
+            self._entry(i)[2] for i in range(self.frame_count)
+        ]
+
+    def __len__(self):
+        return self.frame_count
+
+    def _entry(self, i):
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + i * INDEX_ENTRY.size)
+
+    def frame(self, i):
+        offset, length, _ = self._entry(i)
+        return self._mmap[offset:offset + length]
+
+    def index_at(self, seconds):
+        """Index of the last frame shown at or before ``seconds``"""
+        return max(bisect.bisect_right(self.timestamps, seconds) - 1, 0)
+
+    def close(self):
+        self._mmap.close()
+
+    def acquire(self):
+        with self._refs_lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._refs_lock:
+            self._refs -= 1
+            unused = self._retired and self._refs <= 0
+        if unused:
+            self.close()
+
+    def retire(self):
+        """Unmap the pack once no one holds it any more (now if no one does)"""
+        with self._refs_lock:
+            self._retired = True
+            unused = self._refs <= 0
+        if unused:
+            self.close()
+
+
+def open_frame_pack(video_id, profile=DEFAULT_STREAM_PROFILE):
+    """Return a shared FramePack for the video, or ``None`` if none was built.
+
+    The caller gets a reference it must ``release()``; ``FramePackPlayer``
+    takes it over and releases it in ``close()``.
+    """
+    path = pack_path(video_id, profile)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _open_packs_lock:
+        cached = _open_packs.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1].acquire()
+        try:
+            pack = FramePack(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Unable to open frame pack {path}: {str(e)}")
+            return None
+        _open_packs[path] = (mtime, pack)
+        if cached:
+            # The rebuilt file replaces it; viewers still playing keep it mapped
+            cached[1].retire()
+        return pack.acquire()
+
+
+class FramePackPlayer:
+    """Per-viewer playback of a frame pack at the source frame rate.
+
+    Shares the ``get_frame(cursor)`` API of live streams: the cursor is a
+    sequence number that keeps growing as playback loops over the pack. The
+    player owns one reference to ``pack`` and releases it in ``close()``.
+    """
+
+    def __init__(self, pack, start_index=0):
+        self.pack = pack
+        self.start_index = start_index
+        self.start_position = pack.timestamps[start_index] if len(pack) else 0.0
+        self.clock = FrameClock(pack.fps)
+
+    @property
+    def fps(self):
+        return self.clock.target_fps
+
+    def close(self):
+        if self.pack is not None:
+            self.pack.release()
+            self.pack = None
+
+    def _next(self, cursor, dropped):
+        # Frames missed while the viewer was behind are skipped, not replayed late
+        seq = (1 if cursor is None else cursor + 1) + dropped
+        index = (self.start_index + seq - 1) % len(self.pack)
+        return seq, self.pack.frame(index)
+
+    def get_frame(self, cursor=None):
+        if not len(self.pack):
+            return cursor, None
+        delay, dropped = self.clock.schedule()
+        if delay > 0:
+            time.sleep(delay)
+        return self._next(cursor, dropped)
+
+    async def get_frame_async(self, cursor=None):
+        if not len(self.pack):
+            return cursor, None
+        delay, dropped = self.clock.schedule()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._next(cursor, dropped)
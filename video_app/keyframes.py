@@ -0,0 +1,94 @@
+import bisect
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_path(video_id):
+    return os.path.join(settings.MEDIA_ROOT, 'keyframes', f"{video_id}.json")
+
+
+def probe_keyframes(video_path):
+    """List keyframe timestamps (seconds) of the first video stream with ffprobe.
+
+    Only keyframes are decoded (``-skip_frame nokey``), so this is cheap even
+    for long videos. Returns ``None`` when ffprobe is unavailable, fails or
+    runs longer than ``KEYFRAME_PROBE_TIMEOUT`` seconds.
+    """
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+             '-show_entries', 'frame=pts_time', '-of', 'csv=p=0', video_path],
+            capture_output=True, text=True, timeout=getattr(settings, 'KEYFRAME_PROBE_TIMEOUT', 120),
+        )
+    except subprocess.TimeoutExpired:
+        logger.error(f"ffprobe timed out listing keyframes of {video_path}")
+        return None
+    if result.returncode != 0:
+        logger.error(f"ffprobe failed for {video_path}: {result.stderr.strip()}")
+        return None
+    times = []
+    for line in result.stdout.splitlines():
+        try:
+            times.append(float(line.strip().rstrip(',')))
+        except ValueError:
+            continue
+    return sorted(times)
+
+
+def build_keyframe_index(video_id, video_path):
+    """Probe and store the keyframe index of a video; returns the timestamps"""
+    keyframes = probe_keyframes(video_path)
+    if keyframes is None:
+        return None
+    path = index_path(video_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump({'keyframes': keyframes}, f)
+    os.replace(f"{path}.tmp", path)
+    with _indexes_lock:
+        _indexes[video_id] = keyframes
+    logger.info(f"Built keyframe index for video {video_id}: {len(keyframes)} keyframes")
+    return keyframes
+
+
+def get_keyframe_index(video_id, video_path=None):
+    """Return the cached keyframe timestamps, or ``None`` if there is no index.
+
+    The index is built by ``process_video`` after upload. Only background
+    callers pass ``video_path`` to build a missing one here; requests never
+    run ffprobe. Misses are not cached, so an index built later is picked up.
+    """
+    with _indexes_lock:
+        if video_id in _indexes:
+            return _indexes[video_id]
+    try:
+        with open(index_path(video_id)) as f:
+            keyframes = json.load(f)['keyframes']
+    except (OSError, ValueError, KeyError):
+        if video_path is None:
+            return None
+        return build_keyframe_index(video_id, video_path)
+    with _indexes_lock:
+        _indexes[video_id] = keyframes
+    return keyframes
+
+
+def nearest_keyframe(keyframes, seconds):
+    """Latest keyframe at or before ``seconds`` (``seconds`` itself without an index)"""
+    if not keyframes:
+        return seconds
+    i = bisect.bisect_right(keyframes, seconds) - 1
+    return keyframes[max(i, 0)]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from video_app.metadata import store_video_metadata
+from video_app.models import Video
+
+
+class Command(BaseCommand):
+    help = 'Probe videos uploaded before metadata was stored at ingest and save size, duration, fps, resolution and codec'
+
+    def add_arguments(self, parser):
+        parser.add_argument('video_ids', nargs='*', type=int, help='Videos to process (default: all)')
+        parser.add_argument('--force', action='store_true', help='Probe videos that already have metadata')
+
+    def handle(self, *args, **options):
+        videos = Video.objects.all().only('id')
+        if options['video_ids']:
+            videos = videos.filter(id__in=options['video_ids'])
+        if not options['force']:
+            videos = videos.filter(fps__isnull=True)
+
+        for video in videos.iterator():
+            try:
+                metadata = store_video_metadata(video.id)
+            except Exception as e:
+                self.stderr.write(f"Video {video.id} failed: {str(e)}")
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Video {video.id}: {metadata['width']}x{metadata['height']}, {metadata['duration'] or 0:.1f}s"
+            ))
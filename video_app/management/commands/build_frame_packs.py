@@ -0,0 +1,36 @@
+import os
+from django.core.management.base import BaseCommand
+from video_app.framepack import build_frame_pack, pack_path
+from video_app.models import Video
+from video_app.streaming import DEFAULT_STREAM_PROFILE, get_stream_profiles
+
+
+class Command(BaseCommand):
+    help = 'Pre-encode MJPEG frame packs so the stream endpoint can serve them without OpenCV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('video_ids', nargs='*', type=int, help='Videos to process (default: all)')
+        parser.add_argument('--force', action='store_true', help='Rebuild packs that already exist')
+        parser.add_argument(
+            '--profile', action='append', choices=list(get_stream_profiles()),
+            help=f'Stream profile to encode, may be repeated (default: {DEFAULT_STREAM_PROFILE})'
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.all().only('id', 'file_path')
+        if options['video_ids']:
+            videos = videos.filter(id__in=options['video_ids'])
+
+        profiles = options['profile'] or [DEFAULT_STREAM_PROFILE]
+        for video in videos.iterator():
+            for profile in profiles:
+                path = pack_path(video.id, profile)
+                if os.path.exists(path) and not options['force']:
+                    self.stdout.write(f"Skipping video {video.id} ({profile}): pack exists")
+                    continue
+                try:
+                    frames = build_frame_pack(video.file_path.path, path, profile)
+                except Exception as e:
+                    self.stderr.write(f"Video {video.id} ({profile}) failed: {str(e)}")
+                    continue
+                self.stdout.write(self.style.SUCCESS(f"Video {video.id} ({profile}): {frames} frames"))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from video_app.models import Video
+from video_app.transcoding import stale_after, transcode_video
+
+
+class Command(BaseCommand):
+    help = 'Transcode videos still pending, such as those uploaded before HLS transcoding existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('video_ids', nargs='*', type=int, help='Videos to process (default: all pending)')
+        parser.add_argument('--failed', action='store_true', help='Also retry videos whose transcode failed')
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='Also retry videos left processing longer than a transcode may run (their worker died)',
+        )
+
+    def handle(self, *args, **options):
+        statuses = [Video.TRANSCODE_PENDING]
+        if options['failed']:
+            statuses.append(Video.TRANSCODE_FAILED)
+        selected = Q(transcode_status__in=statuses)
+        if options['stale']:
+            selected |= Q(
+                transcode_status=Video.TRANSCODE_PROCESSING,
+                updated_at__lt=timezone.now() - timedelta(seconds=stale_after()),
+            )
+        videos = Video.objects.filter(selected).only('id')
+        if options['video_ids']:
+            videos = videos.filter(id__in=options['video_ids'])
+
+        for video in videos.iterator():
+            transcode_video(video.id)
+            video.refresh_from_db(fields=['transcode_status', 'transcode_error'])
+            if video.transcode_status == Video.TRANSCODE_READY:
+                self.stdout.write(self.style.SUCCESS(f"Video {video.id}: ready"))
+            else:
+                self.stderr.write(f"Video {video.id} failed: {video.transcode_error}")
@@ -0,0 +1,46 @@
+import cv2
+import logging
+import os
+from .keyframes import get_keyframe_index
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+
+def fourcc_to_codec(fourcc):
+    """Turn OpenCV's packed FOURCC code into its four-character name"""
+    fourcc = int(fourcc)
+    return ''.join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip('\x00 ').lower()
+
+
+def probe_metadata(path):
+    """Read size and stream properties of a video file with OpenCV"""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Failed to open video: {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        return {
+            'file_size': os.path.getsize(path),
+            'fps': fps,
+            'frame_count': frame_count,
+            'duration': frame_count / fps if fps and frame_count else None,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            'codec': fourcc_to_codec(cap.get(cv2.CAP_PROP_FOURCC)),
+        }
+    finally:
+        cap.release()
+
+
+def store_video_metadata(video_id):
+    """Probe a video once and keep the result on its row; returns the stored fields"""
+    video = Video.objects.only('id', 'file_path').get(id=video_id)
+    metadata = probe_metadata(video.file_path.path)
+    keyframes = get_keyframe_index(video_id, video.file_path.path)
+    metadata['keyframe_count'] = len(keyframes) if keyframes is not None else None
+    Video.objects.filter(id=video_id).update(**metadata)
+    logger.info(f"Stored metadata for video {video_id}: {metadata['width']}x{metadata['height']} "
+                f"{metadata['codec']} {metadata['fps']} fps")
+    return metadata
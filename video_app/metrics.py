@@ -0,0 +1,152 @@
+"""
+Streaming metrics in the Prometheus text exposition format.
+
+Streams keep their own counters and histograms; :func:`render_metrics` walks
+the streams open in a ``StreamManager`` when the endpoint is scraped, so
+nothing is computed on the streaming path beyond a few additions.
+"""
+import bisect
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; a 720p JPEG encode typically lands between 2 and 20 ms
+ENCODE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Counter:
+    """Monotonic value that is safe to increment from several threads"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    def __init__(self, buckets=ENCODE_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """``([(upper bound, cumulative count), ...], sum, count)``"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+
+# Bytes written to stream viewers by this process, frame packs included
+bytes_sent_total = Counter()
+
+
+def _labels(labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, kind, help_text, value, labels=None, suffix=''):
+        family = self.families.setdefault(name, (kind, help_text, []))
+        label_text = f'{{{_labels(labels)}}}' if labels else ''
+        family[2].append(f'{name}{suffix}{label_text} {_format_value(value)}')
+
+    def add_histogram(self, name, help_text, histogram, labels):
+        buckets, total, count = histogram.snapshot()
+        for bound, cumulative in buckets:
+            self.add(name, 'histogram', help_text, cumulative,
+                     dict(labels, le=_format_value(bound)), suffix='_bucket')
+        self.add(name, 'histogram', help_text, total, labels, suffix='_sum')
+        self.add(name, 'histogram', help_text, count, labels, suffix='_count')
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text, samples) in self.families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def render_metrics(manager):
+    """Per-stream and process-wide metrics of ``manager`` as Prometheus text.
+
+    Private (seek) streams are keyed per viewer and come and go with each
+    seek, so they are only reported summed per ``(video_id, profile)``
+    rather than as label sets of their own.
+    """
+    out = _Exposition()
+    streams = manager.snapshot()
+    private = {}
+    for key, stream in streams:
+        if getattr(stream, 'private', False):
+            opened, viewers = private.get(key[:2], (0, 0))
+            private[key[:2]] = (opened + 1, viewers + stream.viewers)
+            continue
+        labels = {
+            'stream': '_'.join(str(part) for part in key),
+            'video_id': key[0],
+            'profile': key[1],
+        }
+        out.add('video_stream_viewers', 'gauge', 'Viewers attached to the stream',
+                stream.viewers, labels)
+        out.add('video_stream_bytes_sent_total', 'counter', 'Bytes sent to viewers of the stream',
+                stream.bytes_sent.value, labels)
+        stats = getattr(stream, 'metrics', None)
+        if stats is None:
+            continue # Decoding happens in another process (shared memory streams)
+        stats = stats()
+        out.add('video_stream_decode_fps', 'gauge', 'Frames decoded per second by the capture loop',
+                stats['decode_fps'], labels)
+        out.add('video_stream_target_fps', 'gauge', 'Source frame rate the capture loop is paced to',
+                stats['target_fps'], labels)
+        out.add('video_stream_frames_decoded_total', 'counter', 'Frames decoded by the capture loop',
+                stats['frames_decoded'], labels)
+        out.add('video_stream_dropped_frames_total', 'counter', 'Frames skipped to keep up with the source rate',
+                stats['dropped_frames'], labels)
+        out.add('video_stream_encode_queue_depth', 'gauge', 'Frames captured but not yet published',
+                stats['queue_depth'], labels)
+        out.add_histogram('video_stream_encode_seconds', 'Time spent resizing and JPEG-encoding one frame',
+                          stats['encode_latency'], labels)
+
+    for (video_id, profile), (opened, viewers) in private.items():
+        labels = {'video_id': video_id, 'profile': profile}
+        out.add('video_private_streams_open', 'gauge', 'Private (seek) streams open for the video and profile',
+                opened, labels)
+        out.add('video_private_stream_viewers', 'gauge', 'Viewers of private (seek) streams of the video and profile',
+                viewers, labels)
+
+    out.add('video_streams_open', 'gauge', 'Streams open in this process, warm ones included',
+            len(streams))
+    out.add('video_streams_active', 'gauge', 'Streams with at least one viewer',
+            sum(1 for _, stream in streams if stream.viewers > 0))
+    out.add('video_capture_handles_open', 'gauge', 'Open OpenCV VideoCapture handles',
+            sum(1 for _, stream in streams if getattr(stream, 'cap', None) is not None))
+    out.add('video_stream_process_bytes_sent_total', 'counter', 'Bytes sent to stream viewers by this process',
+            bytes_sent_total.value)
+    return out.render()
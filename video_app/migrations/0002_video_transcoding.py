@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='transcode_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='transcode_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='file_path',
+            field=models.FileField(upload_to='videos/'),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='title',
+            field=models.CharField(max_length=100),
+        ),
+    ]
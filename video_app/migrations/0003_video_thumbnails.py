@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0002_video_transcoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='preview_vtt',
+            field=models.FileField(blank=True, null=True, upload_to='thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='thumbnail_sizes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0007_video_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='upload',
+            name='video',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='video_app.video'),
+        ),
+    ]
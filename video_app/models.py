@@ -1,11 +1,27 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils.text import slugify
 import os
 import uuid
 
+# Slugs are 50 characters; leave room for a "-xxxxxx" collision suffix
+SLUG_BASE_LENGTH = 43
+SLUG_ATTEMPTS = 3
+
 
 class Video(models.Model):
+    TRANSCODE_PENDING = 'pending'
+    TRANSCODE_PROCESSING = 'processing'
+    TRANSCODE_READY = 'ready'
+    TRANSCODE_FAILED = 'failed'
+    TRANSCODE_STATUS_CHOICES = [
+        (TRANSCODE_PENDING, 'Pending'),
+        (TRANSCODE_PROCESSING, 'Processing'),
+        (TRANSCODE_READY, 'Ready'),
+        (TRANSCODE_FAILED, 'Failed'),
+    ]
+
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     file_path = models.FileField(upload_to='videos/')
@@ -15,30 +31,57 @@ class Video(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     slug = models.SlugField(unique=True, blank=True)
     views = models.PositiveIntegerField(default=0)
+    transcode_status = models.CharField(max_length=20, choices=TRANSCODE_STATUS_CHOICES, default=TRANSCODE_PENDING)
+    transcode_error = models.TextField(blank=True)
+    # Generated after upload: poster size name -> storage name, and the sprite's WebVTT index
+    thumbnail_sizes = models.JSONField(default=dict, blank=True)
+    preview_vtt = models.FileField(upload_to='thumbnails/', null=True, blank=True)
+    # Probed once at ingest so list responses and stream start-up need no file access
+    file_size = models.BigIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    fps = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    codec = models.CharField(max_length=16, blank=True)
+    frame_count = models.PositiveIntegerField(null=True, blank=True)
+    keyframe_count = models.PositiveIntegerField(null=True, blank=True)
+    # Maintained by a database trigger on PostgreSQL (see search.install_search_index)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Keyset pagination walks these orders (see pagination.SORT_ORDERINGS)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='video_created_id_idx'),
+            models.Index(fields=['-views', '-id'], name='video_views_id_idx'),
+        ]
 
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            # Create base slug from title
-            base_slug = slugify(self.title)
-            
-            # Check if slug exists
-            if Video.objects.filter(slug=base_slug).exists():
-                # Add random suffix
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # Try the plain title slug first and only add a random suffix when the
+        # unique index rejects it, instead of querying for the slug up front
+        base_slug = slugify(self.title)[:SLUG_BASE_LENGTH] or 'video'
+        self.slug = base_slug
+        for attempt in range(SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1 or not Video.objects.filter(slug=self.slug).exists():
+                    self.slug = ''
+                    raise
                 suffix = str(uuid.uuid4())[:6]
                 self.slug = f"{base_slug}-{suffix}"
-            else:
-                self.slug = base_slug
-                
-        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.title
 
     def get_file_size(self):
+        if self.file_size is not None:
+            return self.file_size
         if self.file_path:
             file_path = self.file_path.path  # Get absolute path
             if os.path.exists(file_path):  
@@ -49,3 +92,29 @@ class Video(models.Model):
         if self.thumbnail:
             return self.thumbnail.url
         return None
+
+
+class Upload(models.Model):
+    """A resumable (tus-style) upload; chunks are written straight to ``file_name``"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    title = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    file_name = models.CharField(max_length=255)  # Storage name, becomes Video.file_path
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    # Deleting the video ends the upload, so a finished upload is never finalized twice
+    video = models.OneToOneField(Video, null=True, blank=True, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.offset}/{self.length})"
+
+    @property
+    def path(self):
+        return os.path.join(settings.MEDIA_ROOT, self.file_name)
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
@@ -0,0 +1,123 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+# ``?sort=`` value -> keyset ordering; the trailing ``id`` makes every key unique
+SORT_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'popular': ('-views', '-id'),
+}
+DEFAULT_SORT = 'newest'
+
+
+def sort_ordering(request):
+    return SORT_ORDERINGS.get(request.query_params.get('sort', DEFAULT_SORT), SORT_ORDERINGS[DEFAULT_SORT])
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """Rows strictly after ``position`` (one value per ordering field) in ``ordering``.
+
+    ``('-views', '-id')`` at ``(5, 42)`` gives
+    ``Q(views__lt=5) | Q(views=5, id__lt=42)``; ``reverse`` gives the rows before it.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-') != reverse
+        equal = {f.lstrip('-'): value for f, value in zip(ordering[:i], position)}
+        condition |= Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": position[i]})
+    return condition
+
+
+class VideoCursorPagination(CursorPagination):
+    """Keyset pagination over the ``?sort=`` order of the video catalog.
+
+    The cursor holds the full sort key of the page edge, e.g. ``(views, id)``,
+    and the next page is fetched with ``WHERE (views, id) < cursor``, so ties
+    in the first field never repeat or skip rows and the cost of a page does
+    not grow with its distance from the start like ``OFFSET`` does.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        # Views may page in another order, e.g. search results by relevance
+        return getattr(view, 'pagination_ordering', None) or sort_ordering(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(self.get_ordering(request, queryset, view))
+        self.model = queryset.model
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        if reverse:
+            queryset = queryset.order_by(*(f[1:] if f.startswith('-') else f"-{f}" for f in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(keyset_filter(self.ordering, cursor['p'], reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        first = self.position(self.page[0]) if self.page else (cursor and cursor['p'])
+        last = self.position(self.page[-1]) if self.page else (cursor and cursor['p'])
+        if reverse:
+            self.next_position = last
+            self.previous_position = first if has_more else None
+        else:
+            self.next_position = last if has_more else None
+            self.previous_position = first if cursor else None
+        return self.page
+
+    def position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor({'p': self.next_position, 'r': 0})
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor({'p': self.previous_position, 'r': 1})
+
+    def encode_cursor(self, cursor):
+        # Full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=lambda value: value.isoformat()).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if len(cursor['p']) != len(self.ordering):
+                raise ValueError('Cursor does not match the ordering')
+            cursor['p'] = [self.to_python(field, value) for field, value in zip(self.ordering, cursor['p'])]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def to_python(self, field, value):
+        # JSON has no datetimes; model fields know how to read them back
+        try:
+            return self.model._meta.get_field(field.lstrip('-')).to_python(value)
+        except FieldDoesNotExist:
+            return value # Annotations such as search rank are plain numbers
@@ -0,0 +1,62 @@
+"""
+Signed playback URLs.
+
+Asking for playback once (authenticated, one ``Video`` query) returns stream
+and file URLs carrying a token signed with ``SECRET_KEY``. The token holds
+everything playback needs (video id, storage name, fps and profile), so the
+stream and file views check it in memory and open the file without touching
+the database, however often the player reconnects, until it expires after
+``PLAYBACK_URL_TTL`` seconds. It also holds the id of the user it was issued
+to, so plays through it are counted per user rather than per client address.
+"""
+from collections import namedtuple
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from .models import Video
+
+SALT = 'video_app.playback'
+
+# ``viewer`` is the view-count key the token was issued to, ``None`` without a token
+PlaybackSource = namedtuple('PlaybackSource', ['video_id', 'path', 'fps', 'profile', 'viewer'], defaults=[None])
+
+
+class PlaybackDenied(Exception):
+    pass
+
+
+def sign_playback(video, profile, user=None):
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    return signing.dumps(
+        {'v': video.id, 'n': video.file_path.name, 'f': video.fps, 'p': profile, 'u': user_id},
+        salt=SALT, compress=True,
+    )
+
+
+def load_playback(token, video_id):
+    """The ``PlaybackSource`` a token grants for ``video_id``"""
+    try:
+        data = signing.loads(token, salt=SALT, max_age=getattr(settings, 'PLAYBACK_URL_TTL', 3600))
+    except signing.SignatureExpired:
+        raise PlaybackDenied('Playback URL has expired')
+    except signing.BadSignature:
+        raise PlaybackDenied('Invalid playback signature')
+    if data['v'] != video_id:
+        raise PlaybackDenied('Playback URL is for another video')
+    viewer = f"user:{data['u']}" if data.get('u') is not None else None
+    return PlaybackSource(video_id, default_storage.path(data['n']), data['f'], data['p'], viewer)
+
+
+def resolve_playback(request, video_id, profile):
+    """Where to play ``video_id`` from: the signed ``?token=``, else a ``Video`` lookup.
+
+    Raises ``PlaybackDenied`` for a bad token, or for a missing one when
+    ``PLAYBACK_SIGNED_ONLY`` is set, and ``Video.DoesNotExist``.
+    """
+    token = request.GET.get('token')
+    if token:
+        return load_playback(token, video_id)
+    if getattr(settings, 'PLAYBACK_SIGNED_ONLY', False):
+        raise PlaybackDenied('A signed playback URL is required')
+    video = Video.objects.only('file_path', 'fps').get(id=video_id)
+    return PlaybackSource(video.id, video.file_path.path, video.fps, profile)
@@ -0,0 +1,223 @@
+import mimetypes
+import os
+import uuid
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+# Ignore Range headers asking for more pieces than this instead of
+# building a huge multipart body (RFC 7233 section 6.1)
+MAX_RANGES = 16
+CHUNK_SIZE = 256 * 1024
+
+
+class FileRange:
+    """File-like view over ``length`` bytes of ``file`` starting at ``start``.
+
+    It keeps ``fileno()`` so WSGI servers with ``wsgi.file_wrapper`` (gunicorn)
+    can ``sendfile`` the slice.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def is_asgi(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def read_pieces(file, pieces):
+    """Body made of literal ``bytes`` pieces and ``(start, length)`` slices of ``file``"""
+    try:
+        for piece in pieces:
+            if isinstance(piece, bytes):
+                yield piece
+                continue
+            part = FileRange(file, *piece)
+            while chunk := part.read(CHUNK_SIZE):
+                yield chunk
+    finally:
+        file.close()
+
+
+async def read_pieces_async(file, pieces):
+    """Async version of :func:`read_pieces`; reads run in a thread.
+
+    Django's ASGI handler drains a synchronous iterator (``FileResponse``
+    included) into memory before sending it, so ASGI needs this to stream.
+    """
+    read = sync_to_async(lambda part: part.read(CHUNK_SIZE), thread_sensitive=False)
+    try:
+        for piece in pieces:
+            if isinstance(piece, bytes):
+                yield piece
+                continue
+            part = await sync_to_async(FileRange, thread_sensitive=False)(file, *piece)
+            while chunk := await read(part):
+                yield chunk
+    finally:
+        file.close()
+
+
+def stream_pieces(request, file, pieces, length, **kwargs):
+    """``StreamingHttpResponse`` over ``pieces``, async under ASGI"""
+    body = read_pieces_async(file, pieces) if is_asgi(request) else read_pieces(file, pieces)
+    response = StreamingHttpResponse(body, **kwargs)
+    response['Content-Length'] = length
+    return response
+
+
+def make_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range_header(header, size):
+    """Parse a ``bytes=`` Range header into sorted, merged ``(start, end)`` pairs.
+
+    Returns ``None`` when the header should be ignored (missing, malformed or
+    too many ranges) and ``[]`` when no range is satisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        first, sep, last = part.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+            else:
+                # Suffix range: the last N bytes
+                suffix = int(last)
+                if suffix == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(request, etag, last_modified):
+    """Check ``If-Range`` against the current validators (strong match only)"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, path, content_type=None):
+    """Serve a file with RFC 7233 byte-range support.
+
+    Handles single and multiple ranges, ``If-Range`` and the usual
+    ETag/Last-Modified conditional requests. Under WSGI, full and
+    single-range responses are plain ``FileResponse`` objects so the server
+    can use zero-copy ``sendfile``; under ASGI they stream from an async
+    iterator in ``CHUNK_SIZE`` reads. Multi-range responses stream a
+    ``multipart/byteranges`` body.
+    """
+    file = open(path, 'rb')
+    stat = os.fstat(file.fileno())
+    size = stat.st_size
+    etag = make_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        file.close()
+        return finish(conditional)
+
+    ranges = None
+    if if_range_matches(request, etag, last_modified):
+        ranges = parse_range_header(request.headers.get('Range'), size)
+
+    if ranges is None:
+        if is_asgi(request):
+            response = stream_pieces(request, file, [(0, size)], size, content_type=content_type)
+            response['Content-Disposition'] = content_disposition_header(False, os.path.basename(path))
+        else:
+            response = FileResponse(file, content_type=content_type)
+            response.block_size = CHUNK_SIZE
+        return finish(response)
+
+    if not ranges:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        if is_asgi(request):
+            response = stream_pieces(
+                request, file, [(start, end - start + 1)], end - start + 1, status=206, content_type=content_type
+            )
+        else:
+            response = FileResponse(FileRange(file, start, end - start + 1), status=206, content_type=content_type)
+            response.block_size = CHUNK_SIZE
+            response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return finish(response)
+
+    boundary = uuid.uuid4().hex
+    pieces = []
+    for start, end in ranges:
+        pieces.append((f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+                       f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode())
+        pieces.append((start, end - start + 1))
+        pieces.append(b'\r\n')
+    pieces.append(f'--{boundary}--\r\n'.encode())
+    length = sum(len(piece) if isinstance(piece, bytes) else piece[1] for piece in pieces)
+    response = stream_pieces(
+        request, file, pieces, length, status=206, content_type=f'multipart/byteranges; boundary={boundary}'
+    )
+    return finish(response)
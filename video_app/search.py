@@ -0,0 +1,145 @@
+"""
+Video search.
+
+On PostgreSQL a trigger keeps ``Video.search_vector`` (title, description and
+uploader name, weighted in that order) up to date, a GIN index serves prefix
+full-text queries and a trigram index on the title catches typos. Other
+databases (SQLite in tests) fall back to scoring rows in Python with the same
+weights, which scans the table and is only meant for small datasets.
+A second trigger refreshes a user's videos when their username changes.
+"""
+import difflib
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+# Weights PostgreSQL's ts_rank gives to A (title), B (description) and C (username) lexemes
+FIELD_WEIGHTS = (('title', 1.0), ('description', 0.4), ('user__username', 0.2))
+# Minimum difflib ratio for a word to count as a misspelling of a search term
+FUZZY_RATIO = 0.75
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def search_videos(queryset, query):
+    """Filter ``queryset`` to videos matching ``query``, annotated with ``rank``"""
+    terms = tokenize(query)
+    if not terms:
+        return _no_matches(queryset)
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgres_search(queryset, query, terms)
+    return _python_search(queryset, terms)
+
+
+def _no_matches(queryset):
+    # Still annotated, so callers can order by rank either way
+    return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def _postgres_search(queryset, query, terms):
+    # Every term must match, as a prefix, so "adv cat" finds "adventure cats"
+    tsquery = SearchQuery(' & '.join(f"{term}:*" for term in terms), search_type='raw', config=SEARCH_CONFIG)
+    # ts_rank + similarity is real (float4); the keyset paginator compares the
+    # page edge as a float8 parameter, which never equals the float4 value
+    return queryset.annotate(
+        rank=Cast(SearchRank(F('search_vector'), tsquery) + TrigramSimilarity('title', query), FloatField()),
+    ).filter(Q(search_vector=tsquery) | Q(title__trigram_similar=query))
+
+
+def _term_score(term, words):
+    best = 0.0
+    for word in words:
+        if word.startswith(term):
+            return 1.0
+        ratio = difflib.SequenceMatcher(None, term, word).ratio()
+        if ratio >= FUZZY_RATIO:
+            best = max(best, ratio / 2)
+    return best
+
+
+def score_document(terms, fields):
+    """Rank of one row given its ``(text, weight)`` fields; 0 unless every term matches"""
+    fields = [(tokenize(text or ''), weight) for text, weight in fields]
+    rank = 0.0
+    for term in terms:
+        score = max((_term_score(term, words) * weight for words, weight in fields), default=0.0)
+        if not score:
+            return 0.0
+        rank += score
+    return rank
+
+
+def _python_search(queryset, terms):
+    names = [name for name, _ in FIELD_WEIGHTS]
+    ranks = {}
+    for row in queryset.values_list('id', *names).iterator():
+        rank = score_document(terms, zip(row[1:], (weight for _, weight in FIELD_WEIGHTS)))
+        if rank:
+            ranks[row[0]] = rank
+    if not ranks:
+        return _no_matches(queryset)
+    return queryset.filter(id__in=ranks).annotate(
+        rank=Case(*[When(id=id, then=Value(rank)) for id, rank in ranks.items()], output_field=FloatField()),
+    )
+
+
+def install_search_index(using='default', **kwargs):
+    """Create the PostgreSQL trigger and indexes behind ``Video.search_vector``.
+
+    Runs after every ``migrate`` (also when tests build tables without
+    migrations); every statement is idempotent.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    from django.contrib.auth import get_user_model
+    from .models import Video
+
+    videos, users = Video._meta.db_table, get_user_model()._meta.db_table
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"""
+        CREATE OR REPLACE FUNCTION {videos}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(
+                    (SELECT username FROM {users} WHERE id = NEW.user_id), '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {videos}_search_vector ON {videos}",
+        f"""
+        CREATE TRIGGER {videos}_search_vector
+        BEFORE INSERT OR UPDATE OF title, description, user_id ON {videos}
+        FOR EACH ROW EXECUTE FUNCTION {videos}_search_vector()
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION {users}_refresh_video_search() RETURNS trigger AS $$
+        BEGIN
+            UPDATE {videos} SET title = title WHERE user_id = NEW.id;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {users}_refresh_video_search ON {users}",
+        f"""
+        CREATE TRIGGER {users}_refresh_video_search
+        AFTER UPDATE OF username ON {users}
+        FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+        EXECUTE FUNCTION {users}_refresh_video_search()
+        """,
+        f"UPDATE {videos} SET title = title WHERE search_vector IS NULL",
+        f"CREATE INDEX IF NOT EXISTS video_search_vector_idx ON {videos} USING gin (search_vector)",
+        f"CREATE INDEX IF NOT EXISTS video_title_trgm_idx ON {videos} USING gin (title gin_trgm_ops)",
+    ]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -1,49 +1,125 @@
 from rest_framework import serializers
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from urllib.parse import urljoin
 from .models import Video
 
+VALID_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv']
+MAX_VIDEO_SIZE = 524288000  # 500MB in bytes
+
 class VideoSerializer(serializers.ModelSerializer):
-    file_size = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_urls = serializers.SerializerMethodField()
+    preview_vtt_url = serializers.SerializerMethodField()
+    hls_url = serializers.SerializerMethodField()
     username = serializers.CharField(source='user.username', read_only=True)
     
     class Meta:
         model = Video
         fields = [
             'id', 'title', 'description', 'file_path', 
-            'thumbnail', 'thumbnail_url', 'created_at', 
+            'thumbnail', 'thumbnail_url', 'thumbnail_urls',
+            'preview_vtt_url', 'created_at', 
             'updated_at', 'user', 'username', 'views', 
-            'file_size'
+            'file_size', 'duration', 'fps', 'width', 'height', 'codec',
+            'frame_count', 'keyframe_count', 'transcode_status', 'hls_url'
+        ]
+        read_only_fields = [
+            'user', 'views', 'file_size', 'duration', 'fps', 'width', 'height', 'codec',
+            'frame_count', 'keyframe_count', 'transcode_status'
         ]
-        read_only_fields = ['user', 'views', 'file_size']
-    
-    def get_file_size(self, obj):
-        return obj.get_file_size()
     
-    def get_thumbnail_url(self, obj):
+    def absolute_url(self, url):
+        """Make a site-relative URL absolute, resolving the host once per serializer"""
         request = self.context.get('request')
-        if obj.thumbnail and request:
-            return request.build_absolute_uri(obj.thumbnail.url)
+        if request is None:
+            return None
+        # With many=True one child serializer renders every row, so this is once per page
+        if not hasattr(self, '_base_url'):
+            self._base_url = request.build_absolute_uri('/')
+        return urljoin(self._base_url, url)
+
+    def get_thumbnail_url(self, obj):
+        if obj.thumbnail:
+            return self.absolute_url(obj.thumbnail.url)
+        return None
+
+    def get_thumbnail_urls(self, obj):
+        """Generated poster in every configured size, keyed by size name"""
+        if 'request' not in self.context:
+            return {}
+        return {
+            size: self.absolute_url(default_storage.url(name))
+            for size, name in obj.thumbnail_sizes.items()
+        }
+
+    def get_preview_vtt_url(self, obj):
+        if obj.preview_vtt:
+            return self.absolute_url(obj.preview_vtt.url)
         return None
     
+    def get_hls_url(self, obj):
+        if obj.transcode_status == Video.TRANSCODE_READY:
+            return self.absolute_url(
+                reverse('video-hls', kwargs={'video_id': obj.id, 'name': 'master.m3u8'})
+            )
+        return None
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        request = self.context.get('request')
-        if request and instance.file_path:
-            representation['file_path'] = request.build_absolute_uri(instance.file_path.url)
+        if 'file_path' in representation and instance.file_path and 'request' in self.context:
+            representation['file_path'] = self.absolute_url(instance.file_path.url)
         return representation
     
     def validate_file_path(self, value):
         # Validate file type
-        valid_extensions = ['.mp4', '.avi', '.mov', '.mkv']
         ext = value.name.lower().split('.')[-1]
-        if f'.{ext}' not in valid_extensions:
+        if f'.{ext}' not in VALID_VIDEO_EXTENSIONS:
             raise serializers.ValidationError(
                 'Unsupported file format. Please upload MP4, AVI, MOV, or MKV files.'
             )
         # Validate file size (e.g., max 500MB)
-        if value.size > 524288000:  # 500MB in bytes
+        if value.size > MAX_VIDEO_SIZE:
             raise serializers.ValidationError(
                 'File size too large. Maximum size is 500MB.'
             )
         return value
-    
\ No newline at end of file
+
+
+class VideoListSerializer(VideoSerializer):
+    """Slim catalog representation.
+
+    ``?fields=id,title,...`` picks any of the ``VideoSerializer`` fields;
+    without it only ``DEFAULT_FIELDS`` are rendered.
+    """
+    DEFAULT_FIELDS = [
+        'id', 'title', 'thumbnail_url', 'username', 'views', 'created_at',
+        'duration', 'width', 'height', 'file_size', 'transcode_status',
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if requested:
+            wanted = {name.strip() for name in requested.split(',')}
+        else:
+            wanted = set(self.DEFAULT_FIELDS)
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+    # Model columns behind the computed fields
+    FIELD_COLUMNS = {
+        'username': ['user__username'],
+        'thumbnail_url': ['thumbnail'],
+        'thumbnail_urls': ['thumbnail_sizes'],
+        'preview_vtt_url': ['preview_vtt'],
+        'hls_url': ['transcode_status'],
+    }
+
+    def columns(self):
+        """Columns to load (``QuerySet.only``) for the fields being rendered"""
+        columns = {'id', 'user'}
+        for name in self.fields:
+            columns.update(self.FIELD_COLUMNS.get(name, [name]))
+        return sorted(columns)
@@ -0,0 +1,360 @@
+"""
+Cross-process frame store for popular streams.
+
+One producer process per video decodes and encodes frames into a ring in
+``multiprocessing.shared_memory``; every web worker attaches to the ring as a
+reader. Adding workers then adds readers, not decoders.
+
+Ring layout (little endian)::
+
+    header (64 bytes): magic, slot count, slot size, fps,
+                       producer heartbeat, reader heartbeat, latest seq
+    slots:             seq (u64), length (u32), padding, frame bytes
+
+Readers use the slot sequence number as a seqlock: a frame is only returned if
+the slot still holds the same sequence after it has been copied out.
+"""
+import asyncio
+import fcntl
+import logging
+import multiprocessing
+import os
+import signal
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from django.conf import settings
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'VSFR'
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<QI4x')
+MAGIC_OFFSET, SLOT_COUNT_OFFSET, SLOT_SIZE_OFFSET = 0, 4, 8
+FPS_OFFSET, PRODUCER_BEAT_OFFSET, READER_BEAT_OFFSET, SEQ_OFFSET = 16, 24, 32, 40
+
+# A producer that has not written a heartbeat for this long is considered dead
+PRODUCER_TIMEOUT = 3.0
+# How long a new producer retries its lock while workers probe it (LOCK_SH)
+PRODUCER_LOCK_WAIT = 0.5
+
+
+def segment_name(stream_key):
+    return f"vs_frames_{stream_key}"
+
+
+def lock_path(stream_key):
+    run_dir = getattr(settings, 'STREAM_RUN_DIR', tempfile.gettempdir())
+    return os.path.join(run_dir, f"vs_frames_{stream_key}.lock")
+
+
+class SharedFrameRing:
+    """Fixed-size ring of encoded frames in a named shared memory segment"""
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        if bytes(self.buf[:4]) != MAGIC and not owner:
+            raise ValueError(f"Shared memory segment {shm.name} is not a frame ring")
+
+    @classmethod
+    def create(cls, name, slot_count, slot_size, fps):
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        size = HEADER_SIZE + slot_count * (SLOT_HEADER.size + slot_size)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # Workers share one resource tracker with the producer, so the producer
+        # unlinks the segment itself instead of relying on the tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        ring = cls(shm, owner=True)
+        struct.pack_into('<II', ring.buf, SLOT_COUNT_OFFSET, slot_count, slot_size)
+        struct.pack_into('<dddQ', ring.buf, FPS_OFFSET, fps, time.time(), time.time(), 0)
+        ring.buf[MAGIC_OFFSET:MAGIC_OFFSET + 4] = MAGIC
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the producer's segment when they exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm)
+
+    def _get(self, fmt, offset):
+        return struct.unpack_from(fmt, self.buf, offset)[0]
+
+    @property
+    def slot_count(self):
+        return self._get('<I', SLOT_COUNT_OFFSET)
+
+    @property
+    def slot_size(self):
+        return self._get('<I', SLOT_SIZE_OFFSET)
+
+    @property
+    def fps(self):
+        return self._get('<d', FPS_OFFSET)
+
+    @property
+    def latest_seq(self):
+        return self._get('<Q', SEQ_OFFSET)
+
+    def producer_alive(self):
+        return time.time() - self._get('<d', PRODUCER_BEAT_OFFSET) < PRODUCER_TIMEOUT
+
+    def reader_idle_for(self):
+        return time.time() - self._get('<d', READER_BEAT_OFFSET)
+
+    def heartbeat(self):
+        struct.pack_into('<d', self.buf, PRODUCER_BEAT_OFFSET, time.time())
+
+    def _slot_offset(self, seq):
+        return HEADER_SIZE + (seq % self.slot_count) * (SLOT_HEADER.size + self.slot_size)
+
+    def publish(self, frame):
+        """Write a frame into the next slot (producer only)"""
+        if len(frame) > self.slot_size:
+            logger.warning(f"Frame of {len(frame)} bytes exceeds shared slot size {self.slot_size}")
+            return None
+        seq = self.latest_seq + 1
+        offset = self._slot_offset(seq)
+        # Invalidate the slot while it is being rewritten
+        SLOT_HEADER.pack_into(self.buf, offset, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(frame)] = frame
+        SLOT_HEADER.pack_into(self.buf, offset, seq, len(frame))
+        struct.pack_into('<Q', self.buf, SEQ_OFFSET, seq)
+        struct.pack_into('<d', self.buf, PRODUCER_BEAT_OFFSET, time.time())
+        return seq
+
+    def read(self, cursor=None):
+        """Return ``(seq, frame)`` for the first frame after ``cursor`` or ``(cursor, None)``"""
+        struct.pack_into('<d', self.buf, READER_BEAT_OFFSET, time.time())
+        for _ in range(3):
+            latest = self.latest_seq
+            if cursor is None:
+                cursor = max(latest - 1, 0)
+            if latest <= cursor:
+                return cursor, None
+            seq = max(cursor + 1, latest - self.slot_count + 1)
+            offset = self._slot_offset(seq)
+            slot_seq, length = SLOT_HEADER.unpack_from(self.buf, offset)
+            if slot_seq != seq:
+                continue
+            start = offset + SLOT_HEADER.size
+            frame = bytes(self.buf[start:start + length])
+            if SLOT_HEADER.unpack_from(self.buf, offset)[0] == seq:
+                return seq, frame
+        return cursor, None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def acquire_producer_lock(stream_key, wait=PRODUCER_LOCK_WAIT):
+    """The producer lock file, held exclusively, or ``None`` if another producer holds it.
+
+    ``producer_running`` probes take a shared lock for an instant, so a
+    failed attempt is retried for ``wait`` seconds before giving up.
+    """
+    lock_file = open(lock_path(stream_key), 'w')
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                lock_file.close()
+                return None
+            time.sleep(0.01)
+
+
+def run_producer(stream_key, video_path, profile, slot_count, slot_size, idle_timeout):
+    """Entry point of the per-video producer process.
+
+    Holds an exclusive lock for ``stream_key`` so only one producer exists per
+    video across all workers, and exits once no reader has touched the ring
+    for ``idle_timeout`` seconds.
+    """
+    import django
+    django.setup()
+    from .streaming import VideoStreamThread
+
+    # Daemon producers are terminated with their worker; unwind so the ring is unlinked
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    lock_file = acquire_producer_lock(stream_key)
+    if lock_file is None:
+        return # Another process already produces this stream
+
+    source = VideoStreamThread(video_path, buffer_size=slot_count, profile=profile)
+    source.add_viewer()
+    ring = SharedFrameRing.create(segment_name(stream_key), slot_count, slot_size, source.fps)
+    logger.info(f"Shared frame producer started: {stream_key} (pid {os.getpid()})")
+    try:
+        cursor = None
+        while ring.reader_idle_for() < idle_timeout:
+            cursor, frame = source.get_frame(cursor)
+            if frame is None:
+                if not source.is_running:
+                    break
+                ring.heartbeat()
+                continue
+            ring.publish(frame)
+    finally:
+        source.remove_viewer()
+        source.stop()
+        ring.close()
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+        logger.info(f"Shared frame producer stopped: {stream_key}")
+
+
+def producer_running(stream_key):
+    """Check the producer lock without taking it over.
+
+    A shared lock only conflicts with the producer's exclusive one, so
+    workers probing at the same time do not mistake each other for a producer.
+    """
+    with open(lock_path(stream_key), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+
+class SharedFrameStream:
+    """Reader side of a shared stream, used by StreamManager in each worker.
+
+    It exposes the same viewer API as ``VideoStreamThread`` so views do not
+    care whether frames come from a local thread or from another process.
+    """
+
+    def __init__(self, stream_key, video_path, profile, buffer_size=30):
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+        self.stream_key = stream_key
+        self.video_path = video_path
+        self.buffer_size = buffer_size
+        self.profile = profile
+        self.slot_size = getattr(settings, 'STREAM_SHARED_SLOT_SIZE', 512 * 1024)
+        self.idle_timeout = getattr(settings, 'STREAM_SHARED_IDLE_TIMEOUT', 10)
+        self.ring = None
+        self.viewers = 0
+        self.idle_since = None
+        self.bytes_sent = Counter()
+        self.fps = 30
+        self.frame_delay = 1 / self.fps
+        self.lock = threading.Lock()
+        self._attach_lock = threading.Lock()
+
+    def _spawn_producer(self):
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(
+            target=run_producer,
+            args=(self.stream_key, self.video_path, self.profile, self.buffer_size, self.slot_size, self.idle_timeout),
+            daemon=True,
+        )
+        process.start()
+        logger.info(f"Spawned shared frame producer for {self.stream_key}")
+
+    def _attach(self, timeout=5.0):
+        """Attach to the ring, starting a producer process if there is none"""
+        with self._attach_lock:
+            if self.ring is not None and self.ring.producer_alive():
+                return True
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+            if not producer_running(self.stream_key):
+                self._spawn_producer()
+
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                try:
+                    ring = SharedFrameRing.attach(segment_name(self.stream_key))
+                    if ring.producer_alive():
+                        self.ring = ring
+                        self.fps = ring.fps or 30
+                        self.frame_delay = 1 / self.fps
+                        return True
+                    ring.close()
+                except (FileNotFoundError, ValueError):
+                    pass
+                time.sleep(0.05)
+            logger.error(f"Shared frame producer did not start: {self.stream_key}")
+            return False
+
+    @property
+    def latest_seq(self):
+        return self.ring.latest_seq if self.ring is not None else 0
+
+    def _poll_interval(self):
+        return min(max(self.frame_delay / 4, 0.002), 0.02)
+
+    def get_frame(self, cursor=None):
+        """Poll the shared ring for the frame after ``cursor``"""
+        deadline = time.monotonic() + max(0.5, 4 * self.frame_delay)
+        while True:
+            if self.ring is None or not self.ring.producer_alive():
+                if not self._attach():
+                    return cursor, None
+                cursor = None # A restarted producer numbers frames from scratch
+            seq, frame = self.ring.read(cursor)
+            if frame is not None or time.monotonic() >= deadline:
+                return seq, frame
+            cursor = seq
+            time.sleep(self._poll_interval())
+
+    async def get_frame_async(self, cursor=None):
+        """Awaitable version of :meth:`get_frame`"""
+        deadline = time.monotonic() + max(0.5, 4 * self.frame_delay)
+        while True:
+            if self.ring is None or not self.ring.producer_alive():
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, self._attach):
+                    return cursor, None
+                cursor = None
+            seq, frame = self.ring.read(cursor)
+            if frame is not None or time.monotonic() >= deadline:
+                return seq, frame
+            cursor = seq
+            await asyncio.sleep(self._poll_interval())
+
+    def add_viewer(self):
+        # No attach here: StreamManager calls this under its lock, and a cold
+        # attach spawns a producer and waits for it. get_frame attaches lazily.
+        with self.lock:
+            self.viewers += 1
+            self.idle_since = None
+
+    def remove_viewer(self):
+        with self.lock:
+            if self.viewers > 0:
+                self.viewers -= 1
+                if self.viewers == 0:
+                    self.idle_since = time.monotonic()
+
+    def cleanup(self):
+        """Detach from the ring; the producer exits on its own once idle"""
+        with self._attach_lock:
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
@@ -1,30 +1,347 @@
+import asyncio
 import cv2
 import threading
 from django.conf import settings
 import logging
 import time
-from queue import Queue, Empty
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 from .models import Video
+from .keyframes import nearest_keyframe
+from .metrics import Counter, Histogram
 import os
 
 logger = logging.getLogger(__name__)
 
+
+# Named output profiles: frames are fitted inside max_width x max_height
+# (keeping the aspect ratio) and JPEG-encoded at the given quality
+DEFAULT_STREAM_PROFILES = {
+    'low': {'max_width': 640, 'max_height': 360, 'quality': 60},
+    'medium': {'max_width': 854, 'max_height': 480, 'quality': 75},
+    'high': {'max_width': 1280, 'max_height': 720, 'quality': 85},
+}
+DEFAULT_STREAM_PROFILE = 'high'
+
+
+def get_stream_profiles():
+    return getattr(settings, 'STREAM_PROFILES', DEFAULT_STREAM_PROFILES)
+
+
+def get_profile(name=None):
+    """Look up a stream profile by name; raises ``ValueError`` for unknown names"""
+    name = name or getattr(settings, 'DEFAULT_STREAM_PROFILE', DEFAULT_STREAM_PROFILE)
+    profiles = get_stream_profiles()
+    if name not in profiles:
+        raise ValueError(f"Unknown profile '{name}'. Choose from: {', '.join(profiles)}")
+    return name
+
+
+def lower_profile(name):
+    """The next smaller profile than ``name``, or ``None`` if it is the smallest"""
+    profiles = get_stream_profiles()
+    by_size = sorted(profiles, key=lambda p: profiles[p]['max_width'] * profiles[p]['max_height'])
+    index = by_size.index(name)
+    return by_size[index - 1] if index > 0 else None
+
+
+def fit_frame(frame, max_width, max_height, upscale=False):
+    """Scale a frame to fit the bounding box without distorting it.
+
+    Frames that already fit are returned untouched unless ``upscale`` is set.
+    Downscaling uses area interpolation, upscaling bilinear.
+    """
+    height, width = frame.shape[:2]
+    scale = min(max_width / width, max_height / height)
+    if scale == 1 or (scale > 1 and not upscale):
+        return frame
+    size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    if size == (width, height):
+        return frame
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    return cv2.resize(frame, size, interpolation=interpolation)
+
+
+def encode_frame(frame, profile=DEFAULT_STREAM_PROFILE):
+    """Fit a decoded frame to a profile and encode it as a JPEG for MJPEG playback"""
+    options = get_stream_profiles()[profile]
+    frame = fit_frame(frame, options['max_width'], options['max_height'], options.get('upscale', False))
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, options['quality']])
+    return buffer.tobytes()
+
+
+_encode_pool = None
+_encode_pool_lock = threading.Lock()
+
+
+def encode_workers():
+    return getattr(settings, 'STREAM_ENCODE_WORKERS', None) or os.cpu_count() or 2
+
+
+def get_encode_pool():
+    """Process-wide pool for resize+encode; OpenCV releases the GIL while it works"""
+    global _encode_pool
+    with _encode_pool_lock:
+        if _encode_pool is None:
+            _encode_pool = ThreadPoolExecutor(max_workers=encode_workers(), thread_name_prefix='stream-encode')
+        return _encode_pool
+
+
+class FrameClock:
+    """Paces frames against the monotonic clock instead of sleeping a fixed delay.
+
+    Deadlines advance by exactly one frame period, so time spent decoding and
+    encoding does not accumulate as drift. When the caller falls a whole frame
+    or more behind, the missed frames are reported as dropped so it can skip
+    them and stay in real time.
+    """
+
+    def __init__(self, fps):
+        self.target_fps = fps or 30
+        self.frame_delay = 1 / self.target_fps
+        self.started = None
+        self.next_due = None
+        self.frames = 0
+        self.dropped = 0
+
+    def schedule(self):
+        """Return ``(delay, dropped)`` for the next frame and advance the clock"""
+        now = time.monotonic()
+        if self.next_due is None:
+            self.started = self.next_due = now
+        dropped = 0
+        lag = now - self.next_due
+        if lag >= self.frame_delay:
+            dropped = int(lag // self.frame_delay)
+            self.next_due += dropped * self.frame_delay
+            self.dropped += dropped
+        delay = max(self.next_due - now, 0.0)
+        self.next_due += self.frame_delay
+        self.frames += 1
+        return delay, dropped
+
+    def wait(self):
+        """Sleep until the next frame is due; returns the number of frames to drop"""
+        delay, dropped = self.schedule()
+        if delay > 0:
+            time.sleep(delay)
+        return dropped
+
+    @property
+    def observed_fps(self):
+        if self.started is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+
+class StageStats:
+    """Frame count and busy time of one pipeline stage"""
+
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.frames += 1
+            self.busy += seconds
+
+    @property
+    def fps(self):
+        elapsed = time.monotonic() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def avg_latency(self):
+        return self.busy / self.frames if self.frames else 0.0
+
+
+class EncodePipeline:
+    """Resize and encode frames on the worker pool, delivering them in capture order.
+
+    ``submit`` is called by the capture thread and blocks once ``max_pending``
+    frames are in flight. A publisher thread waits on the oldest pending frame
+    and hands it to ``on_frame``, so a slow encode never reorders output.
+    """
+
+    def __init__(self, profile, on_frame, max_pending=None, pool=None, latency=None):
+        self.profile = profile
+        self.on_frame = on_frame
+        self.latency = latency # Optional Histogram of encode times
+        self.pool = pool or get_encode_pool()
+        self.pending = Queue(maxsize=max_pending or 2 * encode_workers())
+        self.stats = {'capture': StageStats(), 'encode': StageStats(), 'publish': StageStats()}
+        self._publisher = threading.Thread(target=self._publish_worker, daemon=True)
+        self._publisher.start()
+
+    def _encode(self, frame):
+        started = time.perf_counter()
+        data = encode_frame(frame, self.profile)
+        elapsed = time.perf_counter() - started
+        self.stats['encode'].record(elapsed)
+        if self.latency is not None:
+            self.latency.observe(elapsed)
+        return data
+
+    def submit(self, frame, capture_seconds=0.0):
+        self.stats['capture'].record(capture_seconds)
+        self.pending.put(self.pool.submit(self._encode, frame))
+
+    def _publish_worker(self):
+        while True:
+            future = self.pending.get()
+            if future is None:
+                break
+            try:
+                started = time.perf_counter()
+                self.on_frame(future.result())
+                self.stats['publish'].record(time.perf_counter() - started)
+            except Exception as e:
+                logger.error(f"Frame processing error: {str(e)}")
+
+    def close(self, timeout=None):
+        """Publish frames already in flight, then stop the publisher thread"""
+        self.pending.put(None)
+        self._publisher.join(timeout)
+
+
+def _resolve_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class FrameBroadcast:
+    """Ring buffer that shares each encoded frame with every viewer.
+
+    The producer publishes a frame once under an increasing sequence number.
+    Viewers never consume frames: each one keeps its own cursor and reads the
+    frame after it, skipping ahead when it falls more than a ring behind.
+    """
+
+    def __init__(self, size=30):
+        self.size = size
+        self._slots = [None] * size
+        self._seq = 0 # Sequence number of the newest frame, 0 when empty
+        self._closed = False
+        self._cond = threading.Condition()
+        self._waiters = [] # (event loop, future) pairs of async viewers
+
+    @property
+    def latest_seq(self):
+        return self._seq
+
+    def publish(self, frame):
+        """Store a frame and wake up every waiting viewer"""
+        with self._cond:
+            self._seq += 1
+            self._slots[self._seq % self.size] = frame
+            self._cond.notify_all()
+            self._wake_async_waiters()
+            return self._seq
+
+    def read(self, cursor=None, timeout=None):
+        """Return ``(seq, frame)`` for the first frame after ``cursor``.
+
+        A ``None`` cursor starts at the newest frame. Returns ``(cursor, None)``
+        on timeout or when the broadcast is closed.
+        """
+        with self._cond:
+            if cursor is None:
+                cursor = max(self._seq - 1, 0)
+            self._cond.wait_for(lambda: self._seq > cursor or self._closed, timeout)
+            return self._take(cursor)
+
+    async def read_async(self, cursor=None, timeout=None):
+        """Awaitable version of :meth:`read` for ASGI viewers.
+
+        The producer thread resolves a future on the viewer's event loop, so
+        waiting viewers hold no thread while idle.
+        """
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if cursor is None:
+                cursor = max(self._seq - 1, 0)
+            if self._seq > cursor or self._closed:
+                return self._take(cursor)
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+        with self._cond:
+            return self._take(cursor)
+
+    def _take(self, cursor):
+        if self._closed or self._seq <= cursor:
+            return cursor, None
+        # Lagging viewers jump to the oldest frame still in the ring
+        seq = max(cursor + 1, self._seq - self.size + 1)
+        return seq, self._slots[seq % self.size]
+
+    def _wake_async_waiters(self):
+        for loop, waiter in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+            except RuntimeError:
+                pass # Viewer's event loop already closed
+        self._waiters = []
+
+    def open(self):
+        with self._cond:
+            self._closed = False
+
+    def close(self):
+        """Drop buffered frames and release every waiting viewer"""
+        with self._cond:
+            self._closed = True
+            self._slots = [None] * self.size
+            self._cond.notify_all()
+            self._wake_async_waiters()
+
+
 class VideoStreamThread:
-    def __init__(self, video_path, buffer_size=30):
+    def __init__(self, video_path, buffer_size=30, profile=DEFAULT_STREAM_PROFILE,
+                 start_time=None, start_frame=None, keyframes=None, fps=None):
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
             
         self.video_path = video_path
         self.buffer_size = buffer_size 
-        self.frame_queue = Queue(maxsize=buffer_size)
+        self.profile = profile
+        self.frames = FrameBroadcast(buffer_size)
         self.cap = None
         self.is_running = False # Flag to check if streaming is active
         self.thread = None # Background thread
+        self.pipeline = None # Encode pipeline fed by the capture thread
+        self.clock = None # Paces the capture thread
         self.fps = 30
+        self.frame_delay = 1 / self.fps
+        self.source_fps = fps # Stored at ingest; saves asking the capture on every start
         self.viewers = 0
         self.lock = threading.Lock()# Prevents race conditions in multi-threading
         self._cap_lock = threading.Lock() # Lock for accessing video capture
         self.initialized = threading.Event() # Used to signal when streaming is ready
+        self._worker_active = False # Capture thread running; cleared when it parks
+        self.idle_since = None # Monotonic time the last viewer left
+        # Lifetime metrics, kept across parking and resuming
+        self.bytes_sent = Counter()
+        self.frames_decoded = Counter()
+        self.dropped_frames = Counter()
+        self.encode_latency = Histogram()
+        # Requested start position, snapped to a keyframe when the stream opens
+        self.start_time = start_time
+        self.start_frame = start_frame
+        self.keyframes = keyframes
+        self.start_position = 0.0
 
     def start(self):
         """Start video streaming thread"""
@@ -36,18 +353,18 @@ class VideoStreamThread:
                         raise ValueError(f"Failed to open video: {self.video_path}")
 
                     # Get video properties
-                    self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+                    self.fps = self.source_fps or self.cap.get(cv2.CAP_PROP_FPS) or 30
                     self.frame_delay = 1 / self.fps
+                    self._seek_to_start()
 
-                    # Pre-fill the queue with some frames
-                    for _ in range(min(5, self.buffer_size)):
-                        ret, frame = self.cap.read()
-                        if ret:
-                            frame = cv2.resize(frame, (1280, 720))
-                            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                            self.frame_queue.put(buffer.tobytes())
+                    # Publish the first frame so new viewers don't wait for the worker
+                    self.frames.open()
+                    ret, frame = self.cap.read()
+                    if ret:
+                        self.frames.publish(encode_frame(frame, self.profile))
 
             self.is_running = True
+            self._worker_active = True
             self.thread = threading.Thread(target=self._stream_worker)
             self.thread.daemon = True
             self.thread.start()
@@ -61,59 +378,129 @@ class VideoStreamThread:
             self.cleanup()
             return False
 
+    def _seek_to_start(self):
+        """Jump to the keyframe at or before the requested start position"""
+        if self.start_time is None and self.start_frame is None:
+            return
+        target = self.start_time if self.start_time is not None else self.start_frame / self.fps
+        self.start_position = nearest_keyframe(self.keyframes, target)
+        if self.start_position > 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, self.start_position * 1000)
+
     def _stream_worker(self):
-        """Worker thread for video streaming"""
+        """Capture thread: decode frames and feed them to the encode pipeline"""
+        pipeline = EncodePipeline(self.profile, self.frames.publish, latency=self.encode_latency)
+        self.pipeline = pipeline
+        self.clock = FrameClock(self.fps)
+        parked = False
         try:
-            while self.is_running and self.viewers > 0:
-                if self.frame_queue.full():
-                    time.sleep(self.frame_delay)
-                    continue
-
+            while self.is_running:
+                with self.lock:
+                    if self.viewers == 0:
+                        # Keep the capture open so a returning viewer resumes without reopening it
+                        self._worker_active = False
+                        parked = True
+                        break
+                dropped = self.clock.wait()
                 with self._cap_lock:
                     if self.cap is None:
                         break
+                    # Behind schedule: skip frames without decoding them
+                    for _ in range(dropped):
+                        self.cap.grab()
+                    if dropped:
+                        self.dropped_frames.inc(dropped)
+                    started = time.perf_counter()
                     ret, frame = self.cap.read()
                     if not ret:
                         # Video ended, restart
                         self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
                         continue
+                self.frames_decoded.inc()
 
-                    # Process frame
-                    try:
-                        frame = cv2.resize(frame, (1280, 720))
-                        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                        self.frame_queue.put(buffer.tobytes())
-                    except Exception as e:
-                        logger.error(f"Frame processing error: {str(e)}")
-                        continue
-
-                time.sleep(self.frame_delay)
+                # Resize and encode happen on the pool, outside the capture lock
+                pipeline.submit(frame, time.perf_counter() - started)
         except Exception as e:
             logger.error(f"Streaming error: {str(e)}")
         finally:
-            self.cleanup()
+            pipeline.close(timeout=1.0)
+            logger.info(
+                f"Stream pacing for {self.video_path}: {self.clock.observed_fps:.1f}/"
+                f"{self.clock.target_fps:.1f} fps, {self.clock.dropped} frames dropped"
+            )
+            if not parked:
+                with self.lock:
+                    self._worker_active = False
+                self.cleanup()
+
+    def pacing_stats(self):
+        """Observed vs target frame rate of the capture loop"""
+        clock = self.clock
+        return {
+            'target_fps': clock.target_fps if clock else self.fps,
+            'observed_fps': clock.observed_fps if clock else 0.0,
+            'dropped_frames': clock.dropped if clock else 0,
+        }
+
+    def metrics(self):
+        """Counters and gauges for the metrics endpoint"""
+        clock, pipeline = self.clock, self.pipeline
+        decoding = self._worker_active and clock is not None
+        return {
+            'decode_fps': clock.observed_fps if decoding else 0.0,
+            'target_fps': clock.target_fps if clock else self.fps,
+            'frames_decoded': self.frames_decoded.value,
+            'dropped_frames': self.dropped_frames.value,
+            'queue_depth': pipeline.pending.qsize() if decoding and pipeline else 0,
+            'encode_latency': self.encode_latency,
+        }
 
-    def get_frame(self):
-        """Get next frame from queue"""
+    @property
+    def latest_seq(self):
+        return self.frames.latest_seq
+
+    def get_frame(self, cursor=None):
+        """Get the frame after ``cursor`` as ``(seq, frame)``.
+
+        Every viewer passes back the sequence number it last received, so all
+        viewers see every frame instead of competing for them.
+        """
         try:
             # Wait for stream to initialize
             if not self.initialized.wait(timeout=2.0):
                 logger.error("Stream initialization timeout")
-                return None
-                
-            return self.frame_queue.get(timeout=0.5)
-        except Empty:
-            logger.warning("Frame queue empty")
-            return None
+                return cursor, None
+
+            seq, frame = self.frames.read(cursor, timeout=max(0.5, 4 * self.frame_delay))
+            if frame is None:
+                logger.warning("No frame available")
+            return seq, frame
         except Exception as e:
             logger.error(f"Error getting frame: {str(e)}")
-            return None
+            return cursor, None
+
+    async def get_frame_async(self, cursor=None):
+        """Await the frame after ``cursor`` without blocking a thread"""
+        try:
+            if not self.initialized.is_set():
+                logger.error("Stream not initialized")
+                return cursor, None
+
+            seq, frame = await self.frames.read_async(cursor, timeout=max(0.5, 4 * self.frame_delay))
+            if frame is None:
+                logger.warning("No frame available")
+            return seq, frame
+        except Exception as e:
+            logger.error(f"Error getting frame: {str(e)}")
+            return cursor, None
 
     def add_viewer(self):
         """Add a viewer to the stream"""
         with self.lock:
             self.viewers += 1
-            if self.viewers == 1:
+            self.idle_since = None
+            if not self._worker_active:
+                # First viewer, or the first one back while the stream is parked
                 self.start()
             logger.info(f"Viewer added. Total viewers: {self.viewers}")
 
@@ -124,7 +511,8 @@ class VideoStreamThread:
                 self.viewers -= 1
                 logger.info(f"Viewer removed. Total viewers: {self.viewers}")
                 if self.viewers == 0:
-                    self.stop()
+                    # The capture thread parks itself; StreamManager decides when to stop
+                    self.idle_since = time.monotonic()
 
     def stop(self):
         """Stop the stream"""
@@ -138,21 +526,34 @@ class VideoStreamThread:
             if self.cap is not None:
                 self.cap.release()
                 self.cap = None
-                
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except:
-                pass
+
+        self.frames.close()
         logger.info(f"Cleaned up stream: {self.video_path}")
 
+class StreamCapacityError(Exception):
+    """Raised when every stream slot is held by a stream with active viewers"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many active streams, try again later')
+        self.retry_after = retry_after
+
+
 class StreamManager:
+    """Process-wide pool of open streams.
+
+    Streams whose last viewer left stay open ("warm") for ``STREAM_IDLE_GRACE``
+    seconds so a refresh or reconnect resumes without reopening the video. At
+    most ``STREAM_MAX_ACTIVE`` streams are open at once: the least recently
+    used idle stream is evicted to make room, and when none is idle new streams
+    are refused with :class:`StreamCapacityError`.
+    """
     _instance = None
     _lock = threading.Lock()
     
     def __init__(self):
-        self._streams = {}
+        self._streams = OrderedDict() # Least recently used first
         self._streams_lock = threading.Lock()
+        self._private_streams = 0
 
     @classmethod
     def get_instance(cls):
@@ -162,22 +563,94 @@ class StreamManager:
                     cls._instance = cls()
         return cls._instance
 
-    def get_stream(self, video_id, video_path):
-        """Get or create a video stream"""
+    @property
+    def idle_grace(self):
+        return getattr(settings, 'STREAM_IDLE_GRACE', 15)
+
+    @property
+    def max_streams(self):
+        return getattr(settings, 'STREAM_MAX_ACTIVE', 16)
+
+    def _admit(self):
+        """Make room for one more stream; caller holds ``_streams_lock``"""
+        if len(self._streams) < self.max_streams:
+            return
+        for key, stream in self._streams.items():
+            if stream.viewers == 0:
+                self._evict(key)
+                return
+        raise StreamCapacityError(getattr(settings, 'STREAM_RETRY_AFTER', 5))
+
+    def _evict(self, key):
+        stream = self._streams.pop(key)
+        stream.cleanup()
+        logger.info(f"Evicted stream: {key}")
+
+    def _evict_if_idle(self, key, idle_since):
         with self._streams_lock:
-            if video_id not in self._streams:
-                stream = VideoStreamThread(video_path)
-                self._streams[video_id] = stream
-            stream = self._streams[video_id]
+            stream = self._streams.get(key)
+            # Skip streams that were picked up again (or went idle again later)
+            if stream is not None and stream.viewers == 0 and stream.idle_since == idle_since:
+                self._evict(key)
+
+    def get_stream(self, video_id, video_path, profile=DEFAULT_STREAM_PROFILE, fps=None):
+        """Get or create the shared stream of a video in one output profile"""
+        key = (video_id, profile)
+        with self._streams_lock:
+            if key not in self._streams:
+                self._admit()
+                if getattr(settings, 'STREAM_SHARED_MEMORY', False):
+                    # Decode once per host and share frames across worker processes
+                    from .shared_frames import SharedFrameStream
+                    stream = SharedFrameStream(f"{video_id}_{profile}", video_path, profile=profile)
+                else:
+                    stream = VideoStreamThread(video_path, profile=profile, fps=fps)
+                self._streams[key] = stream
+            self._streams.move_to_end(key)
+            stream = self._streams[key]
+            stream.key = key
             stream.add_viewer()
             return stream
 
-    def release_stream(self, video_id):
-        """Release a stream"""
+    def open_private_stream(self, video_id, video_path, profile=DEFAULT_STREAM_PROFILE, **start):
+        """Start a stream for a single viewer that begins at its own position.
+
+        ``start`` is passed to ``VideoStreamThread`` (``start_time``,
+        ``start_frame``, ``keyframes``, ``fps``). Release it with ``stream.key``.
+        """
+        stream = VideoStreamThread(video_path, profile=profile, **start)
+        stream.private = True
+        with self._streams_lock:
+            self._admit()
+            self._private_streams += 1
+            stream.key = (video_id, profile, self._private_streams)
+            self._streams[stream.key] = stream
+        stream.add_viewer()
+        return stream
+
+    def snapshot(self):
+        """``[(key, stream), ...]`` of every open stream, for metrics"""
+        with self._streams_lock:
+            return list(self._streams.items())
+
+    def release_stream(self, key):
+        """Release a viewer's hold on the stream stored under ``key``"""
+        with self._streams_lock:
+            if key in self._streams:
+                stream = self._streams[key]
+                stream.remove_viewer()
+                if stream.viewers == 0:
+                    # Private streams start at one viewer's position and are never reused
+                    if getattr(stream, 'private', False) or self.idle_grace <= 0:
+                        self._evict(key)
+                    else:
+                        timer = threading.Timer(self.idle_grace, self._evict_if_idle, args=(key, stream.idle_since))
+                        timer.daemon = True
+                        timer.start()
+                logger.info(f"Released stream: {key}")
+
+    def shutdown(self):
+        """Close every stream, warm or not"""
         with self._streams_lock:
-            if video_id in self._streams:
-                self._streams[video_id].remove_viewer()
-                if self._streams[video_id].viewers == 0:
-                    self._streams[video_id].cleanup()
-                    del self._streams[video_id]
-                logger.info(f"Released stream: {video_id}")
\ No newline at end of file
+            for key in list(self._streams):
+                self._evict(key)
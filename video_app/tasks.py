@@ -0,0 +1,69 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """Process-wide pool for background video work (transcoding etc.)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'VIDEO_PROCESSING_WORKERS', 2),
+            thread_name_prefix='video-processing',
+        )
+    return _executor
+
+
+def _run(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception as e:
+        logger.error(f"Background task {func.__name__} failed: {str(e)}")
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args):
+    return get_executor().submit(_run, func, *args)
+
+
+def process_video(video_id):
+    """Everything that runs once after a video is uploaded"""
+    from .catalog_cache import invalidate_catalog
+    from .keyframes import build_keyframe_index
+    from .metadata import store_video_metadata
+    from .models import Video
+    from .thumbnails import generate_thumbnails
+    from .transcoding import transcode_video
+
+    video = Video.objects.get(id=video_id)
+    build_keyframe_index(video_id, video.file_path.path)
+    store_video_metadata(video_id)
+    # Thumbnails first: listing pages need them long before HLS is ready
+    generate_thumbnails(video_id)
+    transcode_video(video_id)
+    if getattr(settings, 'FRAME_PACKS_ENABLED', False):
+        build_video_frame_pack(video_id)
+    # Metadata, thumbnails and status were written with update(), which sends no signals
+    invalidate_catalog()
+
+
+def build_video_frame_pack(video_id):
+    from .framepack import build_frame_pack, pack_path
+    from .models import Video
+    from .streaming import DEFAULT_STREAM_PROFILE
+
+    video = Video.objects.get(id=video_id)
+    for profile in getattr(settings, 'FRAME_PACK_PROFILES', [DEFAULT_STREAM_PROFILE]):
+        build_frame_pack(video.file_path.path, pack_path(video_id, profile), profile)
+
+
+def schedule_video_processing(video):
+    """Queue post-upload processing once the creating transaction commits"""
+    transaction.on_commit(lambda: run_in_background(process_video, video.id))
@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+import pytest
+from django.core.cache import cache
+from video_app.streaming import StreamManager
+from video_app.view_counts import ViewCounter, view_counter
+
+
+@pytest.fixture
+def sample_video_file(settings, tmp_path):
+    """Write a short MJPEG AVI into a temporary MEDIA_ROOT"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    (tmp_path / 'videos').mkdir()
+    path = tmp_path / 'videos' / 'sample.avi'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 25, (320, 240))
+    for i in range(50):
+        frame = np.full((240, 320, 3), i * 5 % 255, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return 'videos/sample.avi'
+
+
+@pytest.fixture(autouse=True)
+def fresh_stream_manager():
+    """Keep warm streams from leaking into the next test"""
+    yield
+    manager, StreamManager._instance = StreamManager._instance, None
+    if manager is not None:
+        manager.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def buffered_view_counts(monkeypatch):
+    """Flush view counts only when a test asks, never from a background timer"""
+    monkeypatch.setattr(ViewCounter, '_schedule_flush', lambda self: None)
+    yield view_counter
+    view_counter._pending.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Cached catalog pages and view dedup keys must not outlive a test"""
+    cache.clear()
+    yield
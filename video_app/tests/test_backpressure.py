@@ -0,0 +1,136 @@
+import asyncio
+import time
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from video_app.backpressure import ViewerPacer
+from video_app.models import Video
+from video_app.streaming import lower_profile
+
+
+def send(pacer, now, took):
+    """Send one frame at ``now`` that takes ``took`` seconds to deliver"""
+    assert pacer.due(now)
+    pacer.sending(now)
+    return pacer.delivered(now + took)
+
+def test_fast_viewer_gets_every_frame():
+    pacer = ViewerPacer(30, min_fps=5)
+    for i in range(60):
+        assert not send(pacer, i / 30, 0.001)
+    assert pacer.fps == 30
+    assert not pacer.lagging
+    assert pacer.catch_up(10, 15) == 10
+
+def test_slow_viewer_skips_backlog_then_lowers_fps_then_profile():
+    pacer = ViewerPacer(30, min_fps=5)
+    now, downgrade = 0.0, False
+    for _ in range(3):
+        sent = now
+        send(pacer, now, 0.1)
+        now += 0.1
+    assert pacer.lagging
+    assert pacer.catch_up(10, 15) == 14
+    assert pacer.fps == 15
+
+    # Frames arriving faster than the lowered rate are dropped for this viewer
+    assert not pacer.due(sent + 1 / 30)
+
+    while not downgrade:
+        downgrade = send(pacer, now, 0.5)
+        now += 0.5
+    assert pacer.fps == 5
+
+def test_recovered_viewer_gets_its_rate_back():
+    pacer = ViewerPacer(30, min_fps=5)
+    now = 0.0
+    for _ in range(3):
+        send(pacer, now, 0.1)
+        now += 0.1
+    assert pacer.fps == 15
+    for _ in range(100):
+        send(pacer, now, 0.001)
+        now += 1 / 15
+    assert pacer.fps == 30
+
+def test_lower_profile():
+    assert lower_profile('high') == 'medium'
+    assert lower_profile('medium') == 'low'
+    assert lower_profile('low') is None
+
+class LiveStream:
+    """Publishes frame ``n`` (its body is ``str(n)``) ``n / fps`` seconds after creation"""
+    fps = 30
+
+    def __init__(self):
+        self.started = time.monotonic()
+
+    @property
+    def latest_seq(self):
+        return int((time.monotonic() - self.started) * self.fps)
+
+    def publish_wait(self, cursor):
+        seq = self.latest_seq if cursor is None else cursor + 1
+        return seq, self.started + seq / self.fps - time.monotonic()
+
+    def get_frame(self, cursor=None):
+        seq, wait = self.publish_wait(cursor)
+        time.sleep(max(wait, 0))
+        return seq, str(seq).encode()
+
+    async def get_frame_async(self, cursor=None):
+        seq, wait = self.publish_wait(cursor)
+        await asyncio.sleep(max(wait, 0))
+        return seq, str(seq).encode()
+
+def frame_seq(chunk):
+    return int(chunk.split(b'\r\n\r\n', 1)[1].split(b'\r\n', 1)[0])
+
+def received_frames(url, asgi, count, delay):
+    """Read ``count`` frames of a real response, taking ``delay`` seconds per frame"""
+    if not asgi:
+        response = Client().get(url)
+        seqs = []
+        for chunk in response.streaming_content:
+            seqs.append(frame_seq(chunk))
+            if len(seqs) == count:
+                break
+            time.sleep(delay)
+        response.close()
+        return seqs
+
+    async def fetch():
+        response = await AsyncClient().get(url)
+        assert response.is_async
+        content, seqs = response.streaming_content, []
+        async for chunk in content:
+            seqs.append(frame_seq(chunk))
+            if len(seqs) == count:
+                break
+            await asyncio.sleep(delay)
+        await content.aclose()
+        return seqs
+    return async_to_sync(fetch)()
+
+@pytest.fixture
+def live_video(monkeypatch, sample_video_file, django_user_model):
+    monkeypatch.setattr('video_app.views.open_stream_source', lambda source, start: LiveStream())
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    return Video.objects.create(title='Live', file_path=sample_video_file, user=user)
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('asgi', [False, True], ids=['wsgi', 'asgi'])
+def test_fast_viewer_receives_every_frame(live_video, asgi):
+    seqs = received_frames(f'/api/videos/{live_video.id}/stream/', asgi, count=10, delay=0)
+    assert seqs == list(range(seqs[0], seqs[0] + 10))
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('asgi', [False, True], ids=['wsgi', 'asgi'])
+def test_slow_viewer_is_paced_through_the_response(live_video, asgi):
+    # 10 frames a second is a third of the source rate
+    seqs = received_frames(f'/api/videos/{live_video.id}/stream/', asgi, count=12, delay=0.1)
+    gaps = [b - a for a, b in zip(seqs, seqs[1:])]
+    # The backlog is skipped instead of sent late ...
+    assert min(gaps[2:]) > 1
+    # ... and the rate drops below the source fps
+    assert sum(gaps[-4:]) >= 4 * 30 / 15
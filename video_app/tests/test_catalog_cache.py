@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def create_user(db):
+    return User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+def create_video(user, title):
+    return Video.objects.create(title=title, file_path=SimpleUploadedFile('v.mp4', b'data'), user=user)
+
+def test_list_is_served_from_cache(create_user, django_assert_num_queries):
+    create_video(create_user, 'First')
+    client = client_for(create_user)
+    first = client.get('/api/videos/')
+    with django_assert_num_queries(0):
+        second = client.get('/api/videos/')
+    assert second.data == first.data
+    assert second['ETag'] == first['ETag']
+    assert client.get('/api/videos/', {'sort': 'oldest'})['ETag'] == first['ETag']
+    assert client.get('/api/videos/', {'fields': 'id'})['ETag'] != first['ETag']
+
+def test_if_none_match_returns_304(create_user):
+    create_video(create_user, 'First')
+    client = client_for(create_user)
+    etag = client.get('/api/videos/')['ETag']
+    response = client.get('/api/videos/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+def test_saving_a_video_invalidates(create_user):
+    video = create_video(create_user, 'First')
+    client = client_for(create_user)
+    etag = client.get('/api/videos/')['ETag']
+
+    video.title = 'Renamed'
+    video.save()
+    response = client.get('/api/videos/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['results'][0]['title'] == 'Renamed'
+
+    video.delete()
+    assert client.get('/api/videos/').data['results'] == []
+
+def test_my_videos_is_cached_per_user(create_user):
+    other = User.objects.create_user(username='other', email='other@gamil.com', password='testpassword')
+    create_video(create_user, 'Mine')
+    assert len(client_for(create_user).get('/api/videos/my_videos/').data['results']) == 1
+    assert client_for(other).get('/api/videos/my_videos/').data['results'] == []
@@ -0,0 +1,82 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from video_app import views
+from video_app.models import Video
+
+
+class Connection:
+    """Stands in for ``django.db.connection`` in the views and logs when it is closed"""
+
+    def __init__(self, events, in_atomic_block=False):
+        self.events = events
+        self.in_atomic_block = in_atomic_block
+
+    def close(self):
+        self.events.append('closed')
+
+
+class Stream:
+    fps = 30
+
+    def __init__(self, events):
+        self.events = events
+
+    def get_frame(self, cursor=None):
+        self.events.append('frame')
+        return (cursor or 0) + 1, b'jpeg'
+
+    async def get_frame_async(self, cursor=None):
+        return self.get_frame(cursor)
+
+
+@pytest.fixture
+def events(monkeypatch):
+    events = []
+    monkeypatch.setattr('video_app.views.connection', Connection(events))
+    monkeypatch.setattr('video_app.views.open_stream_source', lambda source, start: Stream(events))
+    return events
+
+@pytest.fixture
+def create_video(db, sample_video_file, django_user_model):
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    return Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+def test_file_response_releases_db_connection(create_video, events, monkeypatch):
+    serve_file = views.serve_file
+    def serve(request, path, *args):
+        events.append('serve')
+        return serve_file(request, path, *args)
+    monkeypatch.setattr('video_app.views.serve_file', serve)
+
+    response = Client().get(f'/api/videos/{create_video.id}/file/')
+    assert response.status_code == 200
+    assert events == ['closed', 'serve']
+
+    in_transaction = Connection(events, in_atomic_block=True)
+    monkeypatch.setattr('video_app.views.connection', in_transaction)
+    events.clear()
+    assert Client().get(f'/api/videos/{create_video.id}/file/').status_code == 200
+    assert events == ['serve']
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_releases_db_connection_before_frames(create_video, events):
+    response = Client().get(f'/api/videos/{create_video.id}/stream/')
+    assert response.status_code == 200
+    assert events == ['closed']
+    next(iter(response.streaming_content))
+    response.close()
+    assert events == ['closed', 'frame']
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('path', ['stream/', 'stream/async/'])
+def test_asgi_stream_releases_db_connection_before_frames(create_video, events, path):
+    async def fetch():
+        response = await AsyncClient().get(f'/api/videos/{create_video.id}/{path}')
+        assert response.status_code == 200
+        assert events == ['closed']
+        content = response.streaming_content
+        await content.__anext__()
+        await content.aclose()
+    async_to_sync(fetch)()
+    assert events == ['closed', 'frame']
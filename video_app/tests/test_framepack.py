@@ -0,0 +1,62 @@
+import os
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from video_app.framepack import FramePack, FramePackPlayer, build_frame_pack, open_frame_pack, pack_path
+from video_app.models import Video
+from video_app.streaming import StreamManager
+
+User = get_user_model()
+
+@pytest.fixture
+def create_video(sample_video_file, db):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+def test_build_and_read_frame_pack(settings, sample_video_file, tmp_path):
+    path = str(tmp_path / 'sample.pack')
+    assert build_frame_pack(os.path.join(settings.MEDIA_ROOT, sample_video_file), path) == 50
+
+    pack = FramePack(path)
+    assert len(pack) == 50
+    assert pack.fps == 25
+    assert pack.frame(0).startswith(b'\xff\xd8') and pack.frame(49).endswith(b'\xff\xd9')
+    assert pack.index_at(1.0) == 25
+    pack.close()
+
+def test_player_loops_over_pack(create_video):
+    build_frame_pack(create_video.file_path.path, pack_path(create_video.id))
+    pack = open_frame_pack(create_video.id)
+    player = FramePackPlayer(pack, start_index=49)
+    seq, frame = player.get_frame()
+    assert (seq, frame) == (1, pack.frame(49))
+    assert player.get_frame(seq) == (2, pack.frame(0))
+    player.close()
+
+def test_replaced_pack_is_unmapped_after_last_viewer(create_video):
+    path = pack_path(create_video.id)
+    build_frame_pack(create_video.file_path.path, path)
+    old = open_frame_pack(create_video.id)
+    player = FramePackPlayer(old)
+    open_frame_pack(create_video.id).release()
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new = open_frame_pack(create_video.id)
+    assert new is not old
+    # Still mapped for the viewer that was playing it
+    assert player.get_frame()[1] == old.frame(0)
+
+    player.close()
+    assert old._mmap.closed
+    assert not new._mmap.closed
+    new.release()
+
+def test_stream_serves_from_pack(create_video):
+    call_command('build_frame_packs', str(create_video.id))
+    response = APIClient().get(f'/api/videos/{create_video.id}/stream/')
+    assert response.status_code == 200
+    assert next(iter(response.streaming_content)).startswith(b'--frame\r\n')
+    response.close()
+    assert create_video.id not in StreamManager.get_instance()._streams
@@ -0,0 +1,49 @@
+import os
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from video_app.metadata import probe_metadata, store_video_metadata
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def create_video(db, sample_video_file):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+def test_probe_metadata(settings, sample_video_file):
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    metadata = probe_metadata(path)
+    assert metadata == {
+        'file_size': os.path.getsize(path), 'fps': 25.0, 'frame_count': 50, 'duration': 2.0,
+        'width': 320, 'height': 240, 'codec': 'mjpg',
+    }
+
+def test_store_video_metadata(create_video, monkeypatch):
+    monkeypatch.setattr('video_app.metadata.get_keyframe_index', lambda video_id, path: [0.0, 1.0])
+    store_video_metadata(create_video.id)
+    create_video.refresh_from_db()
+    assert (create_video.width, create_video.height, create_video.fps) == (320, 240, 25.0)
+    assert create_video.keyframe_count == 2
+
+def test_backfill_command_skips_probed_videos(create_video, capsys):
+    call_command('backfill_video_metadata')
+    create_video.refresh_from_db()
+    assert create_video.duration == 2.0
+    call_command('backfill_video_metadata')
+    assert capsys.readouterr().out.count(f'Video {create_video.id}:') == 1
+
+def test_list_reads_no_files(create_video, monkeypatch):
+    store_video_metadata(create_video.id)
+    def no_disk(*args):
+        raise AssertionError('filesystem access while listing')
+    monkeypatch.setattr('video_app.models.os.path.exists', no_disk)
+    monkeypatch.setattr('video_app.models.os.path.getsize', no_disk)
+
+    client = APIClient()
+    client.force_authenticate(user=create_video.user)
+    video = client.get('/api/videos/', {'fields': 'file_size,width,height,codec'}).data['results'][0]
+    assert video['file_size'] > 0
+    assert (video['width'], video['height'], video['codec']) == (320, 240, 'mjpg')
@@ -0,0 +1,51 @@
+import os
+import pytest
+from django.test import Client
+from video_app.metrics import Histogram
+from video_app.models import Video
+from video_app.streaming import StreamManager
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in [0.005, 0.01, 0.05, 2.0]:
+        histogram.observe(value)
+    buckets, total, count = histogram.snapshot()
+    assert buckets == [(0.01, 2), (0.1, 3), (float('inf'), 4)]
+    assert (total, count) == (pytest.approx(2.065), 4)
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_stream(sample_video_file, django_user_model):
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+    response = Client().get(f'/api/videos/{video.id}/stream/', {'profile': 'low'})
+    content = iter(response.streaming_content)
+    sent = sum(len(next(content)) for _ in range(3))
+
+    metrics = Client().get('/api/metrics/')
+    response.close()
+    assert metrics.status_code == 200
+    assert metrics['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = metrics.content.decode()
+    labels = f'stream="{video.id}_low",video_id="{video.id}",profile="low"'
+    assert f'video_stream_viewers{{{labels}}} 1' in body
+    assert f'video_stream_bytes_sent_total{{{labels}}} {sent}' in body
+    assert f'video_stream_encode_seconds_bucket{{{labels},le="+Inf"}}' in body
+    assert 'video_capture_handles_open 1' in body
+    assert '# TYPE video_stream_dropped_frames_total counter' in body
+
+def test_metrics_endpoint_is_internal():
+    assert Client(REMOTE_ADDR='203.0.113.9').get('/api/metrics/').status_code == 403
+
+def test_private_streams_are_summed_per_video_and_profile(settings, sample_video_file):
+    manager = StreamManager.get_instance()
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    streams = [manager.open_private_stream(7, path, 'low', start_time=t) for t in (0.5, 1.0)]
+    try:
+        body = Client().get('/api/metrics/').content.decode()
+    finally:
+        for stream in streams:
+            manager.release_stream(stream.key)
+    assert 'video_private_streams_open{video_id="7",profile="low"} 2' in body
+    assert 'video_private_stream_viewers{video_id="7",profile="low"} 2' in body
+    assert 'stream="7_low' not in body
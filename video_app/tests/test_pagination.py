@@ -0,0 +1,68 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def client_with_videos(db):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    for i in range(5):
+        Video.objects.create(
+            title=f'Video {i}', file_path=SimpleUploadedFile(f'{i}.mp4', b'data'), user=user, views=[3, 9, 1, 9, 4][i],
+        )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+def walk(client, url, params):
+    titles = []
+    while url:
+        data = client.get(url, params).data
+        titles += [video['title'] for video in data['results']]
+        url, params = data['next'], None
+    return titles
+
+def test_cursor_pages_cover_every_video_once(client_with_videos):
+    assert walk(client_with_videos, '/api/videos/', {'page_size': 2}) == [f'Video {i}' for i in range(4, -1, -1)]
+    assert walk(client_with_videos, '/api/videos/', {'page_size': 2, 'sort': 'oldest'}) == [f'Video {i}' for i in range(5)]
+
+def test_popular_sort_pages_through_ties(client_with_videos):
+    titles = walk(client_with_videos, '/api/videos/', {'page_size': 1, 'sort': 'popular'})
+    assert titles == ['Video 3', 'Video 1', 'Video 4', 'Video 0', 'Video 2']
+
+def test_list_is_slim_with_sparse_fields(client_with_videos):
+    video = client_with_videos.get('/api/videos/').data['results'][0]
+    assert 'file_path' not in video and 'description' not in video
+    assert {'id', 'title', 'thumbnail_url', 'views'} <= set(video)
+
+    video = client_with_videos.get('/api/videos/', {'fields': 'id,views'}).data['results'][0]
+    assert set(video) == {'id', 'views'}
+
+def test_search_and_my_videos_are_paginated(client_with_videos):
+    data = client_with_videos.get('/api/videos/search/', {'q': 'Video', 'page_size': 3}).data
+    assert len(data['results']) == 3 and data['next']
+    data = client_with_videos.get('/api/videos/my_videos/', {'page_size': 10}).data
+    assert len(data['results']) == 5 and data['next'] is None
+
+def test_popular_sort_pages_through_more_ties_than_offset_cutoff(client_with_videos):
+    user = User.objects.get()
+    Video.objects.bulk_create(
+        Video(title=f'Tied {i}', slug=f'tied-{i}', file_path='videos/tied.mp4', user=user) for i in range(1250)
+    )
+    ids, url, params, pages = [], '/api/videos/', {'sort': 'popular', 'page_size': 100, 'fields': 'id'}, 0
+    while url:
+        data = client_with_videos.get(url, params).data
+        ids += [video['id'] for video in data['results']]
+        url, params, pages = data['next'], None, pages + 1
+    assert len(ids) == len(set(ids)) == 1255
+    assert pages == 13
+
+    # Walking back from the last page returns the previous pages in order
+    data = client_with_videos.get(data['previous']).data
+    assert [video['id'] for video in data['results']] == ids[1100:1200]
+
+def test_empty_search_is_an_empty_page(client_with_videos):
+    assert client_with_videos.get('/api/videos/search/').data == {'next': None, 'previous': None, 'results': []}
@@ -0,0 +1,51 @@
+import pytest
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from video_app.models import Video
+
+User = get_user_model()
+CONTENT = bytes(range(256)) * 4
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def create_video(settings, tmp_path, db):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(
+        title='Test Video',
+        file_path=SimpleUploadedFile("test.mp4", CONTENT, content_type="video/mp4"),
+        user=user,
+    )
+
+def playback_urls(api_client, video, **params):
+    api_client.force_authenticate(user=video.user)
+    response = api_client.get(f'/api/videos/{video.id}/playback/', params)
+    api_client.force_authenticate(user=None)
+    assert response.status_code == 200
+    return {name: urlsplit(url) for name, url in response.data.items() if name.endswith('_url')}
+
+def test_signed_file_url_skips_database(api_client, create_video, django_assert_num_queries):
+    url = playback_urls(api_client, create_video)['file_url']
+    with django_assert_num_queries(0):
+        response = api_client.get(f'{url.path}?{url.query}', HTTP_RANGE='bytes=0-9')
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == CONTENT[:10]
+
+def test_signed_url_is_bound_to_its_video(api_client, create_video, settings):
+    url = playback_urls(api_client, create_video, profile='low')['stream_url']
+    assert api_client.get(f'/api/videos/{create_video.id + 1}/file/?{url.query}').status_code == 403
+    assert api_client.get(f'{url.path}?{url.query}x').status_code == 403
+
+    settings.PLAYBACK_URL_TTL = -1
+    assert api_client.get(f'{url.path}?{url.query}').status_code == 403
+
+def test_signed_only_rejects_bare_urls(api_client, create_video, settings):
+    settings.PLAYBACK_SIGNED_ONLY = True
+    assert api_client.get(f'/api/videos/{create_video.id}/file/').status_code == 403
+    url = playback_urls(api_client, create_video)['file_url']
+    assert api_client.get(f'{url.path}?{url.query}').status_code == 200
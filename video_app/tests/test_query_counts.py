@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def client_with_videos(db):
+    users = [
+        User.objects.create_user(username=f'user{i}', email=f'user{i}@gamil.com', password='testpassword')
+        for i in range(3)
+    ]
+    for i in range(12):
+        Video.objects.create(title=f'Video {i}', file_path=SimpleUploadedFile('v.mp4', b'data'), user=users[i % 3])
+    client = APIClient()
+    client.force_authenticate(user=users[0])
+    return client
+
+def count_queries(client, url, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return len(queries), queries
+
+@pytest.mark.parametrize('url, params', [
+    ('/api/videos/', {}),
+    ('/api/videos/', {'sort': 'popular', 'fields': 'id,username,thumbnail_urls,hls_url'}),
+    ('/api/videos/search/', {'q': 'video'}),
+    ('/api/videos/my_videos/', {}),
+])
+def test_list_queries_do_not_grow_with_page_size(client_with_videos, url, params):
+    expected = 1
+    if url.endswith('/search/') and connection.vendor != 'postgresql':
+        expected = 2 # The fallback scores rows in Python, then fetches the page
+    counts = [count_queries(client_with_videos, url, dict(params, page_size=size))[0] for size in (1, 4, 12)]
+    assert counts == [expected] * 3
+
+def test_list_loads_only_rendered_columns(client_with_videos):
+    _, queries = count_queries(client_with_videos, '/api/videos/', {'fields': 'id,title,username'})
+    sql = queries[0]['sql']
+    assert '"username"' in sql and 'JOIN' in sql
+    assert '"description"' not in sql and '"search_vector"' not in sql
+
+def test_detail_is_one_query(client_with_videos):
+    video = Video.objects.first()
+    assert count_queries(client_with_videos, f'/api/videos/{video.id}/')[0] == 1
+
+def test_slug_collision_retries_with_suffix(db):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    first = Video.objects.create(title='Same title', file_path='videos/a.mp4', user=user)
+    second = Video.objects.create(title='Same title', file_path='videos/b.mp4', user=user)
+    assert first.slug == 'same-title'
+    assert second.slug.startswith('same-title-') and len(second.slug) == len('same-title-') + 6
+    long_title = Video.objects.create(title='x' * 100, file_path='videos/c.mp4', user=user)
+    assert len(long_title.slug) <= 50
@@ -0,0 +1,107 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from video_app.models import Video
+from video_app.ranges import parse_range_header
+
+User = get_user_model()
+CONTENT = bytes(range(256)) * 4
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def create_video(settings, tmp_path, db):
+    settings.MEDIA_ROOT = str(tmp_path)
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(
+        title='Test Video',
+        file_path=SimpleUploadedFile("test.mp4", CONTENT, content_type="video/mp4"),
+        user=user,
+    )
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+def test_parse_range_header():
+    assert parse_range_header('bytes=0-9', 100) == [(0, 9)]
+    assert parse_range_header('bytes=-10', 100) == [(90, 99)]
+    assert parse_range_header('bytes=90-', 100) == [(90, 99)]
+    assert parse_range_header('bytes=0-9,5-19,50-59', 100) == [(0, 19), (50, 59)]
+    assert parse_range_header('bytes=200-300', 100) == []
+    assert parse_range_header('items=0-9', 100) is None
+    assert parse_range_header('bytes=9-0', 100) is None
+
+def test_full_file(api_client, create_video):
+    response = api_client.get(f'/api/videos/{create_video.id}/file/')
+    assert response.status_code == 200
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['Content-Type'] == 'video/mp4'
+    assert body(response) == CONTENT
+
+def test_single_range(api_client, create_video):
+    response = api_client.get(f'/api/videos/{create_video.id}/file/', HTTP_RANGE='bytes=100-199')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response['Content-Length'] == '100'
+    assert body(response) == CONTENT[100:200]
+
+def test_multiple_ranges(api_client, create_video):
+    response = api_client.get(f'/api/videos/{create_video.id}/file/', HTTP_RANGE='bytes=0-9,-10')
+    assert response.status_code == 206
+    assert response['Content-Type'].startswith('multipart/byteranges; boundary=')
+    content = body(response)
+    assert int(response['Content-Length']) == len(content)
+    assert b'Content-Range: bytes 0-9/1024\r\n\r\n' + CONTENT[:10] in content
+    assert b'Content-Range: bytes 1014-1023/1024\r\n\r\n' + CONTENT[-10:] in content
+
+def test_unsatisfiable_range(api_client, create_video):
+    response = api_client.get(f'/api/videos/{create_video.id}/file/', HTTP_RANGE='bytes=5000-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */1024'
+
+def test_if_range_and_etag(api_client, create_video):
+    url = f'/api/videos/{create_video.id}/file/'
+    etag = api_client.get(url)['ETag']
+
+    response = api_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+    assert response.status_code == 206
+
+    response = api_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+def get_over_asgi(url, **headers):
+    """GET ``url`` through Django's ASGI handler; returns the response and its body"""
+    async def fetch():
+        response = await AsyncClient().get(url, headers=headers)
+        # A sync iterator would be drained into memory before sending
+        assert response.is_async
+        return response, b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(fetch)()
+
+@pytest.mark.django_db(transaction=True)
+def test_ranges_stream_under_asgi(create_video, monkeypatch):
+    monkeypatch.setattr('video_app.ranges.CHUNK_SIZE', 100)
+    url = f'/api/videos/{create_video.id}/file/'
+
+    response, content = get_over_asgi(url)
+    assert response.status_code == 200
+    assert response['Content-Length'] == str(len(CONTENT))
+    assert content == CONTENT
+
+    response, content = get_over_asgi(url, Range='bytes=100-349')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 100-349/{len(CONTENT)}'
+    assert content == CONTENT[100:350]
+
+    response, content = get_over_asgi(url, Range='bytes=0-9,-10')
+    assert int(response['Content-Length']) == len(content)
+    assert b'Content-Range: bytes 1014-1023/1024\r\n\r\n' + CONTENT[-10:] in content
@@ -0,0 +1,68 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from video_app.models import Video
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from video_app.search import _postgres_search, score_document, tokenize
+
+User = get_user_model()
+
+@pytest.fixture
+def client_with_videos(db):
+    user = User.objects.create_user(username='catlover', email='testuser@gamil.com', password='testpassword')
+    for title, description in [
+        ('Adventure cats', 'Two cats on a boat'),
+        ('Cooking pasta', 'A dinner adventure'),
+        ('Mountain biking', 'Downhill runs'),
+    ]:
+        Video.objects.create(title=title, description=description, file_path=SimpleUploadedFile('v.mp4', b'data'), user=user)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+def search(client, query, **params):
+    return [video['title'] for video in client.get('/api/videos/search/', dict(params, q=query)).data['results']]
+
+def test_score_document_requires_every_term():
+    fields = [('Adventure cats', 1.0), ('Two cats on a boat', 0.4)]
+    assert score_document(tokenize('adv cat'), fields) == 2.0
+    assert score_document(tokenize('adv dog'), fields) == 0.0
+
+def test_search_ranks_title_matches_first(client_with_videos):
+    assert search(client_with_videos, 'adventure') == ['Adventure cats', 'Cooking pasta']
+    assert search(client_with_videos, 'adventure', page_size=1) == ['Adventure cats']
+
+def test_search_matches_prefixes_typos_and_uploader(client_with_videos):
+    assert search(client_with_videos, 'mount bik') == ['Mountain biking']
+    assert search(client_with_videos, 'montain') == ['Mountain biking']
+    assert len(search(client_with_videos, 'catlover')) == 3
+    assert search(client_with_videos, '!!') == []
+
+def test_search_pages_follow_rank(client_with_videos):
+    first = client_with_videos.get('/api/videos/search/', {'q': 'adventure', 'page_size': 1}).data
+    second = client_with_videos.get(first['next']).data
+    assert [video['title'] for video in second['results']] == ['Cooking pasta']
+    assert second['next'] is None
+
+def test_list_search_parameter(client_with_videos):
+    titles = [video['title'] for video in client_with_videos.get('/api/videos/', {'search': 'cats'}).data['results']]
+    assert titles == ['Adventure cats']
+
+def test_postgres_rank_is_double_precision(db):
+    # A float4 rank never equals the float8 page edge the paginator sends back
+    rank = _postgres_search(Video.objects.all(), 'cat', ['cat']).query.annotations['rank']
+    assert isinstance(rank, Cast) and isinstance(rank.output_field, FloatField)
+
+def test_search_pages_through_rank_ties(client_with_videos):
+    user = User.objects.get()
+    for _ in range(5):
+        Video.objects.create(title='Adventure cats', file_path=SimpleUploadedFile('v.mp4', b'data'), user=user)
+    page, ids = client_with_videos.get('/api/videos/search/', {'q': 'adventure cats', 'page_size': 2}).data, []
+    while True:
+        ids += [video['id'] for video in page['results']]
+        if not page['next']:
+            break
+        page = client_with_videos.get(page['next']).data
+    assert len(ids) == len(set(ids)) == 6
@@ -0,0 +1,93 @@
+import fcntl
+import os
+import threading
+import uuid
+import pytest
+from video_app.shared_frames import (
+    SharedFrameRing, SharedFrameStream, acquire_producer_lock, lock_path, producer_running, segment_name,
+)
+from video_app.streaming import StreamManager
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing.create(segment_name(f"test_{uuid.uuid4().hex[:8]}"), slot_count=4, slot_size=64, fps=25)
+    yield ring
+    ring.close()
+
+def test_ring_readers_in_other_processes_see_every_frame(ring):
+    reader = SharedFrameRing.attach(ring.shm.name)
+    try:
+        for i in range(3):
+            ring.publish(f'frame-{i}'.encode())
+        cursor, frames = 0, []
+        while True:
+            cursor, frame = reader.read(cursor)
+            if frame is None:
+                break
+            frames.append(frame)
+        assert frames == [b'frame-0', b'frame-1', b'frame-2']
+        assert reader.fps == 25
+        assert reader.producer_alive()
+    finally:
+        reader.close()
+
+def test_ring_lagging_reader_skips_ahead(ring):
+    for i in range(10):
+        ring.publish(bytes([i]))
+    assert ring.read(0) == (7, bytes([6]))
+
+def test_ring_drops_oversized_frames(ring):
+    assert ring.publish(b'x' * 65) is None
+    assert ring.latest_seq == 0
+
+def test_shared_stream_spawns_producer_process(settings, sample_video_file):
+    stream = SharedFrameStream(f"test_{uuid.uuid4().hex[:8]}", os.path.join(settings.MEDIA_ROOT, sample_video_file), 'low')
+    stream.idle_timeout = 1
+    stream.add_viewer()
+    try:
+        seq, frame = stream.get_frame()
+        assert frame.startswith(b'\xff\xd8')
+        next_seq, _ = stream.get_frame(seq)
+        assert next_seq > seq
+    finally:
+        stream.remove_viewer()
+        stream.cleanup()
+
+def test_probe_does_not_keep_a_new_producer_from_locking(settings, tmp_path):
+    settings.STREAM_RUN_DIR = str(tmp_path)
+    key = f"test_{uuid.uuid4().hex[:8]}"
+    # Another worker is in the middle of producer_running()
+    probe = open(lock_path(key), 'w')
+    fcntl.flock(probe, fcntl.LOCK_SH)
+    assert not producer_running(key)
+    threading.Timer(0.1, probe.close).start()
+
+    producer = acquire_producer_lock(key)
+    assert producer is not None
+    try:
+        assert producer_running(key)
+        assert acquire_producer_lock(key, wait=0.05) is None
+    finally:
+        producer.close()
+    assert not producer_running(key)
+
+def test_opening_shared_stream_does_not_attach_under_manager_lock(settings, sample_video_file, monkeypatch):
+    settings.STREAM_SHARED_MEMORY = True
+    attached = []
+    def attach(self, timeout=5.0):
+        # A cold attach spawns a producer; other streams must not wait for it
+        lock = StreamManager.get_instance()._streams_lock
+        free = lock.acquire(blocking=False)
+        if free:
+            lock.release()
+        attached.append(free)
+        return False
+    monkeypatch.setattr(SharedFrameStream, '_attach', attach)
+
+    manager = StreamManager.get_instance()
+    stream = manager.get_stream(uuid.uuid4().int % 10**6, os.path.join(settings.MEDIA_ROOT, sample_video_file), 'low')
+    assert attached == []
+    assert stream.get_frame() == (None, None)
+    assert attached == [True]
+    manager.release_stream(stream.key)
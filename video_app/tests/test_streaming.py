@@ -0,0 +1,246 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from video_app.models import Video
+from video_app.keyframes import get_keyframe_index, nearest_keyframe
+from video_app.streaming import (
+    EncodePipeline, FrameBroadcast, FrameClock, StreamCapacityError, StreamManager, encode_frame, fit_frame, get_profile,
+)
+
+
+def test_broadcast_delivers_every_frame_to_every_viewer():
+    frames = FrameBroadcast(size=10)
+    for i in range(5):
+        frames.publish(f'frame-{i}'.encode())
+
+    for _ in range(3):
+        cursor, received = 0, []
+        while True:
+            cursor, frame = frames.read(cursor, timeout=0)
+            if frame is None:
+                break
+            received.append(frame)
+        assert received == [f'frame-{i}'.encode() for i in range(5)]
+
+def test_broadcast_lagging_viewer_skips_ahead():
+    frames = FrameBroadcast(size=4)
+    for i in range(10):
+        frames.publish(i)
+    seq, frame = frames.read(1, timeout=0)
+    assert (seq, frame) == (7, 6)
+
+def test_broadcast_new_viewer_starts_at_latest_frame():
+    frames = FrameBroadcast(size=4)
+    for i in range(3):
+        frames.publish(i)
+    assert frames.read(timeout=0) == (3, 2)
+
+def test_broadcast_close_wakes_waiting_viewers():
+    frames = FrameBroadcast(size=4)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(frames.read(0, timeout=5)))
+    reader.start()
+    frames.close()
+    reader.join(timeout=1)
+    assert result == [(0, None)]
+
+def test_broadcast_async_read_wakes_on_publish():
+    frames = FrameBroadcast(size=4)
+
+    async def read_then_publish():
+        reader = asyncio.ensure_future(frames.read_async(0, timeout=5))
+        await asyncio.sleep(0)
+        threading.Thread(target=frames.publish, args=(b'jpeg',)).start()
+        return await reader
+
+    assert asyncio.run(read_then_publish()) == (1, b'jpeg')
+
+def first_chunk_over_asgi(url):
+    """GET ``url`` through Django's ASGI handler and read one body chunk"""
+    async def fetch():
+        response = await AsyncClient().get(url)
+        assert response.status_code == 200
+        # Django drains synchronous iterators before sending under ASGI
+        assert response.is_async
+        content = response.streaming_content
+        chunk = await content.__anext__()
+        await content.aclose()
+        return chunk
+    return async_to_sync(fetch)()
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('path', ['stream/async/', 'stream/'])
+def test_stream_video_sends_frames_over_asgi(sample_video_file, django_user_model, path):
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+    assert first_chunk_over_asgi(f'/api/videos/{video.id}/{path}').startswith(b'--frame\r\nContent-Type: image/jpeg')
+    assert StreamManager.get_instance()._streams[(video.id, 'high')].viewers == 0
+
+@pytest.mark.django_db
+def test_stream_video_async_missing_video():
+    response = Client().get('/api/videos/999/stream/async/')
+    assert response.status_code == 404
+
+def test_nearest_keyframe():
+    assert nearest_keyframe([0.0, 2.0, 4.0], 3.9) == 2.0
+    assert nearest_keyframe([0.0, 2.0, 4.0], 4.0) == 4.0
+    assert nearest_keyframe(None, 3.9) == 3.9
+
+def test_private_stream_starts_at_keyframe(settings, sample_video_file):
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    stream = StreamManager.get_instance().open_private_stream(1, path, start_time=1.5, keyframes=[0.0, 1.0, 2.0])
+    try:
+        assert stream.start_position == 1.0
+        with stream._cap_lock:
+            assert int(stream.cap.get(cv2.CAP_PROP_POS_FRAMES)) in (26, 27)
+    finally:
+        StreamManager.get_instance().release_stream(stream.key)
+    assert stream.key not in StreamManager.get_instance()._streams
+
+@pytest.mark.django_db
+def test_stream_video_seek(sample_video_file, django_user_model):
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+    response = Client().get(f'/api/videos/{video.id}/stream/', {'frame': 25})
+    assert response.status_code == 200
+    assert response['X-Stream-Start'] == '1.000'
+    response.close()
+
+    assert Client().get(f'/api/videos/{video.id}/stream/', {'t': '-1'}).status_code == 400
+    assert Client().get(f'/api/videos/{video.id}/stream/async/', {'frame': 'x'}).status_code == 400
+    assert Client().get(f'/api/videos/{video.id}/stream/', {'profile': 'ultra'}).status_code == 400
+
+@pytest.mark.django_db
+def test_seek_without_keyframe_index_never_probes(sample_video_file, django_user_model, monkeypatch):
+    def probe(path):
+        raise AssertionError('ffprobe ran in a request')
+    monkeypatch.setattr('video_app.keyframes.probe_keyframes', probe)
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+    response = Client().get(f'/api/videos/{video.id}/stream/', {'t': '1.5'})
+    assert response.status_code == 200
+    assert response['X-Stream-Start'] == '1.500'
+    response.close()
+
+def test_failed_keyframe_probe_is_not_cached(settings, sample_video_file, monkeypatch):
+    monkeypatch.setattr('video_app.keyframes._indexes', {})
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    monkeypatch.setattr('video_app.keyframes.probe_keyframes', lambda path: None)
+    assert get_keyframe_index(1, path) is None
+    monkeypatch.setattr('video_app.keyframes.probe_keyframes', lambda path: [0.0, 2.0])
+    assert get_keyframe_index(1, path) == [0.0, 2.0]
+    assert get_keyframe_index(1) == [0.0, 2.0]
+
+def test_fit_frame_preserves_aspect_and_never_upscales():
+    wide = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    assert fit_frame(wide, 854, 480).shape[:2] == (480, 853)
+    portrait = np.zeros((1280, 720, 3), dtype=np.uint8)
+    assert fit_frame(portrait, 1280, 720).shape[:2] == (720, 405)
+    small = np.zeros((240, 320, 3), dtype=np.uint8)
+    assert fit_frame(small, 1280, 720) is small
+    assert fit_frame(small, 640, 360, upscale=True).shape[:2] == (360, 480)
+
+def test_encode_frame_profiles():
+    frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+    low = cv2.imdecode(np.frombuffer(encode_frame(frame, 'low'), np.uint8), cv2.IMREAD_COLOR)
+    assert low.shape[:2] == (360, 640)
+    assert len(encode_frame(frame, 'low')) < len(encode_frame(frame, 'high'))
+    with pytest.raises(ValueError):
+        get_profile('ultra')
+
+def test_stream_manager_keys_streams_by_profile(settings, sample_video_file):
+    settings.STREAM_IDLE_GRACE = 0
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    manager = StreamManager.get_instance()
+    low = manager.get_stream(7, path, 'low')
+    high = manager.get_stream(7, path, 'high')
+    try:
+        assert low is not high
+        assert manager.get_stream(7, path, 'low') is low
+        assert low.viewers == 2
+        _, frame = low.get_frame()
+        assert cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR).shape[:2] == (240, 320)
+    finally:
+        for key in [(7, 'low'), (7, 'low'), (7, 'high')]:
+            manager.release_stream(key)
+    assert not any(key[0] == 7 for key in manager._streams)
+
+def test_released_stream_stays_warm_for_grace_period(settings, sample_video_file):
+    settings.STREAM_IDLE_GRACE = 0.3
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    manager = StreamManager.get_instance()
+    stream = manager.get_stream(1, path)
+    manager.release_stream(stream.key)
+    time.sleep(0.1)
+    assert stream.key in manager._streams and stream.cap is not None
+    assert manager.get_stream(1, path) is stream
+    assert stream.get_frame()[1] is not None
+    manager.release_stream(stream.key)
+    time.sleep(0.5)
+    assert stream.key not in manager._streams and stream.cap is None
+
+def test_stream_cap_evicts_idle_streams_then_refuses(settings, sample_video_file):
+    settings.STREAM_MAX_ACTIVE = 2
+    path = os.path.join(settings.MEDIA_ROOT, sample_video_file)
+    manager = StreamManager.get_instance()
+    idle = manager.get_stream(1, path)
+    manager.release_stream(idle.key)
+    manager.get_stream(2, path)
+    manager.get_stream(3, path)
+    assert list(manager._streams) == [(2, 'high'), (3, 'high')]
+    with pytest.raises(StreamCapacityError):
+        manager.get_stream(4, path)
+
+@pytest.mark.django_db
+def test_stream_video_over_capacity_returns_503(settings, sample_video_file, django_user_model):
+    settings.STREAM_MAX_ACTIVE = 1
+    user = django_user_model.objects.create_user(email='viewer@example.com', username='viewer', password='pass')
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+    StreamManager.get_instance().get_stream(999, video.file_path.path)
+
+    for url in [f'/api/videos/{video.id}/stream/', f'/api/videos/{video.id}/stream/async/']:
+        response = Client().get(url)
+        assert response.status_code == 503
+        assert response['Retry-After'] == '5'
+
+def test_encode_pipeline_publishes_in_capture_order(monkeypatch):
+    delays = [0.05, 0.0, 0.03, 0.0, 0.01]
+    def slow_encode(frame, profile):
+        time.sleep(delays[frame])
+        return frame
+    monkeypatch.setattr('video_app.streaming.encode_frame', slow_encode)
+
+    published = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pipeline = EncodePipeline('high', published.append, max_pending=4, pool=pool)
+        for i in range(len(delays)):
+            pipeline.submit(i)
+        pipeline.close(timeout=2)
+    assert published == [0, 1, 2, 3, 4]
+    assert pipeline.stats['encode'].frames == 5
+
+def test_frame_clock_paces_without_drift(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('video_app.streaming.time.monotonic', lambda: now[0])
+    clock = FrameClock(25)
+
+    assert clock.schedule() == (0.0, 0)
+    now[0] += 0.01 # Work took 10ms, so only 30ms of the 40ms period remain
+    delay, dropped = clock.schedule()
+    assert dropped == 0 and delay == pytest.approx(0.03)
+
+    now[0] += 0.16 # Stalled: the frames due at +80ms and +120ms were missed
+    delay, dropped = clock.schedule()
+    assert dropped == 2 and delay == 0.0
+    assert clock.next_due == pytest.approx(100.0 + 5 * 0.04)
+    assert clock.dropped == 2
@@ -0,0 +1,45 @@
+import os
+import cv2
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from video_app.models import Video
+from video_app.thumbnails import build_vtt, format_timestamp, generate_thumbnails
+
+User = get_user_model()
+
+@pytest.fixture
+def create_video(db, sample_video_file):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(title='Sample', file_path=sample_video_file, user=user)
+
+def test_format_timestamp():
+    assert format_timestamp(0) == '00:00:00.000'
+    assert format_timestamp(3725.5) == '01:02:05.500'
+
+def test_build_vtt_cues_cover_the_video():
+    vtt = build_vtt([(0, 0, 160, 90), (160, 0, 160, 90)], 5.0, 7.2, 'sprite.jpg')
+    assert vtt.splitlines()[:6] == [
+        'WEBVTT', '',
+        '00:00:00.000 --> 00:00:05.000', 'sprite.jpg#xywh=0,0,160,90', '',
+        '00:00:05.000 --> 00:00:07.200',
+    ]
+
+def test_generate_thumbnails(settings, create_video):
+    generate_thumbnails(create_video.id)
+    create_video.refresh_from_db()
+
+    assert create_video.thumbnail.name == f'thumbnails/{create_video.id}/poster_medium.jpg'
+    small = cv2.imread(os.path.join(settings.MEDIA_ROOT, create_video.thumbnail_sizes['small']))
+    assert small.shape[:2] == (180, 240)
+    sprite = cv2.imread(os.path.join(settings.MEDIA_ROOT, f'thumbnails/{create_video.id}/sprite.jpg'))
+    assert sprite.shape[:2] == (120, 320) # Two 160x120 tiles for a two second video
+    with open(create_video.preview_vtt.path) as f:
+        assert 'sprite.jpg#xywh=160,0,160,120' in f.read()
+
+    client = APIClient()
+    client.force_authenticate(user=create_video.user)
+    data = client.get(f'/api/videos/{create_video.id}/').data
+    assert data['thumbnail_url'].endswith(f'thumbnails/{create_video.id}/poster_medium.jpg')
+    assert set(data['thumbnail_urls']) == {'small', 'medium', 'large'}
+    assert data['preview_vtt_url'].endswith(f'thumbnails/{create_video.id}/sprite.vtt')
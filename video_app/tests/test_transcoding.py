@@ -0,0 +1,105 @@
+import os
+import subprocess
+from datetime import timedelta
+from io import StringIO
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from video_app import transcoding
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def create_user(db):
+    return User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+
+def test_select_ladder_skips_upscaled_renditions():
+    assert [name for name, *_ in transcoding.select_ladder(480)] == ['240p', '480p']
+    assert [name for name, *_ in transcoding.select_ladder(144)] == ['240p']
+
+def test_build_hls_command_maps_every_rendition():
+    ladder = transcoding.select_ladder(720)
+    command = transcoding.build_hls_command('ffmpeg', 'in.mp4', '/out', ladder, 25, audio=False)
+    assert command[command.index('-var_stream_map') + 1] == 'v:0,name:240p v:1,name:480p v:2,name:720p'
+    assert command[command.index('-g') + 1] == '150'
+
+def test_perform_create_schedules_processing(api_client, create_user, sample_video_file, settings, django_capture_on_commit_callbacks, monkeypatch):
+    processed = []
+    monkeypatch.setattr('video_app.tasks.run_in_background', lambda func, *args: processed.append(args))
+    api_client.force_authenticate(user=create_user)
+    with open(os.path.join(settings.MEDIA_ROOT, sample_video_file), 'rb') as f:
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post('/api/videos/', {'title': 'New', 'file_path': f}, format='multipart')
+    assert response.status_code == 201
+    assert response.data['transcode_status'] == Video.TRANSCODE_PENDING
+    assert response.data['file_size'] == os.path.getsize(os.path.join(settings.MEDIA_ROOT, sample_video_file))
+    assert processed == [(response.data['id'],)]
+
+def test_transcode_without_ffmpeg_marks_failed(create_user, sample_video_file, monkeypatch):
+    monkeypatch.setattr(transcoding.shutil, 'which', lambda name: None)
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=create_user)
+    transcoding.transcode_video(video.id)
+    video.refresh_from_db()
+    assert video.transcode_status == Video.TRANSCODE_FAILED
+
+def test_hls_file_serves_segments_only(api_client, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    os.makedirs(tmp_path / 'hls' / '1' / '240p')
+    (tmp_path / 'hls' / '1' / 'master.m3u8').write_text('#EXTM3U\n')
+    (tmp_path / 'hls' / '1' / '240p' / 'segment_00000.ts').write_bytes(b'ts')
+
+    response = api_client.get('/api/videos/1/hls/master.m3u8')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/vnd.apple.mpegurl'
+    assert api_client.get('/api/videos/1/hls/240p/segment_00000.ts')['Content-Type'] == 'video/mp2t'
+    assert api_client.get('/api/videos/1/hls/../../secret.ts').status_code == 404
+    assert api_client.get('/api/videos/1/hls/notes.txt').status_code == 404
+
+def test_transcode_timeout_marks_failed(create_user, sample_video_file, settings, monkeypatch):
+    def run(command, **kwargs):
+        if command[0] == 'ffprobe':
+            return subprocess.CompletedProcess(command, 0, stdout='', stderr='')
+        raise subprocess.TimeoutExpired(command, kwargs['timeout'])
+    settings.TRANSCODE_TIMEOUT = 5
+    monkeypatch.setattr(transcoding.shutil, 'which', lambda name: name)
+    monkeypatch.setattr(transcoding.subprocess, 'run', run)
+    video = Video.objects.create(title='Sample', file_path=sample_video_file, user=create_user)
+
+    transcoding.transcode_video(video.id)
+    video.refresh_from_db()
+    assert (video.transcode_status, video.transcode_error) == (Video.TRANSCODE_FAILED, 'ffmpeg timed out after 5s')
+    assert not os.path.exists(transcoding.hls_root(video.id))
+
+def test_requeue_transcodes_picks_pending_videos(create_user, sample_video_file, monkeypatch):
+    done = []
+    monkeypatch.setattr('video_app.management.commands.requeue_transcodes.transcode_video', done.append)
+    pending, failed, ready = (
+        Video.objects.create(title=status, file_path=sample_video_file, user=create_user, transcode_status=status)
+        for status in (Video.TRANSCODE_PENDING, Video.TRANSCODE_FAILED, Video.TRANSCODE_READY)
+    )
+    call_command('requeue_transcodes', stdout=StringIO(), stderr=StringIO())
+    assert done == [pending.id]
+    call_command('requeue_transcodes', '--failed', stdout=StringIO(), stderr=StringIO())
+    assert sorted(done[1:]) == [pending.id, failed.id]
+
+def test_requeue_transcodes_picks_stale_processing_videos(create_user, sample_video_file, settings, monkeypatch):
+    done = []
+    monkeypatch.setattr('video_app.management.commands.requeue_transcodes.transcode_video', done.append)
+    settings.FFPROBE_TIMEOUT, settings.TRANSCODE_TIMEOUT = 60, 600
+    stale, running = (
+        Video.objects.create(title=title, file_path=sample_video_file, user=create_user, transcode_status=Video.TRANSCODE_PROCESSING)
+        for title in ('stale', 'running')
+    )
+    Video.objects.filter(id=stale.id).update(updated_at=timezone.now() - timedelta(seconds=661))
+
+    call_command('requeue_transcodes', stdout=StringIO(), stderr=StringIO())
+    assert done == []
+    call_command('requeue_transcodes', '--stale', stdout=StringIO(), stderr=StringIO())
+    assert done == [stale.id]
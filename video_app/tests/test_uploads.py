@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import os
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from video_app.models import Upload, Video
+
+User = get_user_model()
+
+OCTET_STREAM = 'application/offset+octet-stream'
+
+
+def encode_metadata(**values):
+    return ','.join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in values.items())
+
+
+@pytest.fixture
+def api_client(db):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.user = user
+    return client
+
+
+@pytest.fixture
+def upload(api_client, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    monkeypatch.setattr('video_app.uploads.schedule_video_processing', lambda video: None)
+    response = api_client.post(
+        '/api/uploads/',
+        HTTP_UPLOAD_LENGTH='10',
+        HTTP_UPLOAD_METADATA=encode_metadata(filename='clip.mp4', title='My clip'),
+    )
+    assert response.status_code == 201
+    assert response['Tus-Resumable'] == '1.0.0'
+    return Upload.objects.get(id=response.data['id'])
+
+
+def patch_chunk(client, upload, offset, data, **headers):
+    return client.generic(
+        'PATCH', f'/api/uploads/{upload.id}/', data,
+        content_type=OCTET_STREAM, HTTP_UPLOAD_OFFSET=str(offset), **headers,
+    )
+
+
+def test_resumed_upload_becomes_video(api_client, upload):
+    assert os.path.getsize(upload.path) == 0
+    assert patch_chunk(api_client, upload, 0, b'01234')['Upload-Offset'] == '5'
+
+    # A client that lost track of the offset asks for it before resuming
+    response = api_client.head(f'/api/uploads/{upload.id}/')
+    assert (response['Upload-Offset'], response['Upload-Length']) == ('5', '10')
+
+    response = patch_chunk(api_client, upload, 5, b'56789')
+    assert response.status_code == 204
+    upload.refresh_from_db()
+    video = Video.objects.get(id=upload.video_id)
+    assert (video.title, video.file_size, video.user) == ('My clip', 10, api_client.user)
+    with open(video.file_path.path, 'rb') as f:
+        assert f.read() == b'0123456789'
+
+
+def test_chunk_at_wrong_offset_conflicts(api_client, upload):
+    patch_chunk(api_client, upload, 0, b'01234')
+    response = patch_chunk(api_client, upload, 3, b'34567')
+    assert response.status_code == 409
+    assert response['Upload-Offset'] == '5'
+
+
+def test_checksum_mismatch_discards_chunk(api_client, upload):
+    good = base64.b64encode(hashlib.sha1(b'01234').digest()).decode()
+    bad = base64.b64encode(hashlib.sha1(b'other').digest()).decode()
+
+    assert patch_chunk(api_client, upload, 0, b'01234', HTTP_UPLOAD_CHECKSUM=f'sha1 {bad}').status_code == 460
+    assert os.path.getsize(upload.path) == 0
+    assert patch_chunk(api_client, upload, 0, b'01234', HTTP_UPLOAD_CHECKSUM=f'sha1 {good}').status_code == 204
+    upload.refresh_from_db()
+    assert upload.offset == 5
+
+
+def test_create_validates_length_and_format(api_client, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    metadata = encode_metadata(filename='clip.mp4')
+    assert api_client.post('/api/uploads/', HTTP_UPLOAD_LENGTH='524288001', HTTP_UPLOAD_METADATA=metadata).status_code == 413
+    assert api_client.post('/api/uploads/', HTTP_UPLOAD_METADATA=metadata).status_code == 400
+    response = api_client.post('/api/uploads/', HTTP_UPLOAD_LENGTH='10', HTTP_UPLOAD_METADATA=encode_metadata(filename='a.txt'))
+    assert response.status_code == 400
+    assert not Upload.objects.exists()
+
+
+def test_upload_is_private_and_deletable(api_client, upload):
+    other = APIClient()
+    other.force_authenticate(User.objects.create_user(username='other', email='other@gamil.com', password='x'))
+    assert other.head(f'/api/uploads/{upload.id}/').status_code == 404
+
+    assert api_client.delete(f'/api/uploads/{upload.id}/').status_code == 204
+    assert not os.path.exists(upload.path)
+    assert not Upload.objects.exists()
+
+
+def test_chunks_over_max_chunk_size_are_refused(api_client, upload, settings):
+    settings.UPLOAD_MAX_CHUNK_SIZE = 4
+    assert api_client.options('/api/uploads/')['Upload-Max-Chunk-Size'] == '4'
+    assert patch_chunk(api_client, upload, 0, b'01234').status_code == 413
+    assert patch_chunk(api_client, upload, 0, b'0123')['Upload-Offset'] == '4'
+
+
+def test_long_filename_fits_video_file_path(api_client, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    monkeypatch.setattr('video_app.uploads.schedule_video_processing', lambda video: None)
+    filename = 'My holiday trip to the mountains with family and friends 2024.mp4'
+    response = api_client.post('/api/uploads/', HTTP_UPLOAD_LENGTH='3', HTTP_UPLOAD_METADATA=encode_metadata(filename=filename))
+    upload = Upload.objects.get(id=response.data['id'])
+    assert len(upload.file_name) <= Video._meta.get_field('file_path').max_length
+    assert upload.file_name.endswith('.mp4')
+
+    patch_chunk(api_client, upload, 0, b'abc')
+    upload.refresh_from_db()
+    assert Video.objects.get(id=upload.video_id).file_path.name == upload.file_name
+
+
+def test_empty_upload_is_refused(api_client, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    response = api_client.post('/api/uploads/', HTTP_UPLOAD_LENGTH='0', HTTP_UPLOAD_METADATA=encode_metadata(filename='clip.mp4'))
+    assert response.status_code == 400
+    assert not Upload.objects.exists()
+
+
+def test_failed_finalize_is_retried_by_next_patch(api_client, upload, monkeypatch):
+    def fail(video):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr('video_app.uploads.schedule_video_processing', fail)
+    with pytest.raises(RuntimeError):
+        patch_chunk(api_client, upload, 0, b'0123456789')
+    upload.refresh_from_db()
+    assert (upload.is_complete, upload.video_id) == (True, None)
+
+    monkeypatch.setattr('video_app.uploads.schedule_video_processing', lambda video: None)
+    response = patch_chunk(api_client, upload, 10, b'')
+    assert (response.status_code, response['Upload-Offset']) == (204, '10')
+    upload.refresh_from_db()
+    assert upload.video_id is not None
+    assert patch_chunk(api_client, upload, 10, b'').status_code == 409
+
+
+def test_cors_preflight_allows_tus_requests(api_client):
+    response = api_client.options(
+        '/api/uploads/',
+        HTTP_ORIGIN='https://video-streaming-frontend-gamma.vercel.app',
+        HTTP_ACCESS_CONTROL_REQUEST_METHOD='PATCH',
+        HTTP_ACCESS_CONTROL_REQUEST_HEADERS='upload-offset,upload-checksum,tus-resumable,content-type',
+    )
+    assert 'PATCH' in response['Access-Control-Allow-Methods']
+    assert 'upload-offset' in response['Access-Control-Allow-Headers']
+    response = api_client.options('/api/uploads/', HTTP_ORIGIN='https://video-streaming-frontend-gamma.vercel.app')
+    assert 'upload-max-chunk-size' in response['Access-Control-Expose-Headers']
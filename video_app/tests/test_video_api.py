@@ -31,7 +31,7 @@ def test_get_queryset(api_client, create_user, create_video):
     api_client.force_authenticate(user=create_user)
     response = api_client.get('/api/videos/')
     assert response.status_code == 200
-    assert len(response.data) == 1
+    assert len(response.data['results']) == 1
 
 def test_perform_create(api_client, create_user):
     api_client.force_authenticate(user=create_user)
@@ -47,7 +47,7 @@ def test_my_videos(api_client, create_user, create_video):
     api_client.force_authenticate(user=create_user)
     response = api_client.get('/api/videos/my_videos/')
     assert response.status_code == 200
-    assert len(response.data) == 1
+    assert len(response.data['results']) == 1
 
 def test_stream_video(api_client, create_video):
     response = api_client.get(f'/api/videos/stream/{create_video.id}/')
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+from rest_framework.test import APIClient
+from video_app.models import Video
+
+User = get_user_model()
+
+@pytest.fixture
+def create_video(db, sample_video_file):
+    user = User.objects.create_user(username='testuser', email='testuser@gamil.com', password='testpassword')
+    return Video.objects.create(title='Sample', file_path=sample_video_file, user=user, views=5)
+
+def test_repeat_plays_count_once_per_window(create_video, buffered_view_counts):
+    other = Video.objects.create(title='Other', file_path=create_video.file_path, user=create_video.user)
+    assert buffered_view_counts.record(create_video.id, 'user:1')
+    assert not buffered_view_counts.record(create_video.id, 'user:1')
+    buffered_view_counts.record(create_video.id, 'user:2')
+    buffered_view_counts.record(other.id, 'user:1')
+
+    assert buffered_view_counts.flush() == 3
+    assert Video.objects.get(id=create_video.id).views == 7
+    assert Video.objects.get(id=other.id).views == 1
+    assert buffered_view_counts.flush() == 0
+
+def test_stream_counts_view_without_writing(create_video, buffered_view_counts, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = Client().get(f'/api/videos/{create_video.id}/stream/')
+        response.close()
+    Client().get(f'/api/videos/{create_video.id}/stream/').close()
+    assert buffered_view_counts.pending(create_video.id) == 1
+
+    buffered_view_counts.flush()
+    create_video.refresh_from_db()
+    assert create_video.views == 6
+
+def play(client, url, **headers):
+    client.get(url, headers=headers).close()
+
+def test_token_viewers_behind_one_proxy_count_separately(create_video, buffered_view_counts):
+    client, urls = APIClient(REMOTE_ADDR='10.0.0.1'), []
+    for user in (create_video.user, User.objects.create_user(username='other', email='other@example.com', password='pass')):
+        client.force_authenticate(user=user)
+        urls.append(client.get(f'/api/videos/{create_video.id}/playback/').json()['stream_url'])
+    # The player streams with the token alone, from the proxy's address
+    client.force_authenticate(user=None)
+    for url in urls + urls:
+        play(client, url)
+    assert buffered_view_counts.pending(create_video.id) == 2
+
+def test_client_address_comes_from_trusted_proxy(create_video, buffered_view_counts, settings):
+    settings.TRUSTED_PROXY_COUNT = 1
+    client, url = Client(REMOTE_ADDR='10.0.0.1'), f'/api/videos/{create_video.id}/stream/'
+    play(client, url, X_Forwarded_For='203.0.113.7')
+    play(client, url, X_Forwarded_For='198.51.100.2')
+    # Entries before the one the proxy added are the client's to forge
+    play(client, url, X_Forwarded_For='198.51.100.9, 203.0.113.7')
+    assert buffered_view_counts.pending(create_video.id) == 2
@@ -0,0 +1,162 @@
+"""
+Poster thumbnails and hover-scrub previews generated after upload.
+
+A single decoding pass samples one frame every few seconds. The samples become
+the tiles of a sprite sheet (indexed by a WebVTT file using ``#xywh=`` media
+fragments), and the most detailed one becomes the poster, saved in every size
+of ``THUMBNAIL_SIZES``.
+"""
+import cv2
+import logging
+import math
+import os
+import numpy as np
+from django.conf import settings
+from .models import Video
+from .streaming import fit_frame
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height)
+DEFAULT_THUMBNAIL_SIZES = {
+    'small': (320, 180),
+    'medium': (640, 360),
+    'large': (1280, 720),
+}
+DEFAULT_THUMBNAIL_SIZE = 'medium'
+SPRITE_TILE_WIDTH = 160
+SPRITE_COLUMNS = 10
+SPRITE_MAX_TILES = 100
+# Without a frame count the sampling interval cannot be derived from the duration
+FALLBACK_INTERVAL = 5.0
+
+
+def thumbnails_name(video_id, filename):
+    """Storage name (relative to MEDIA_ROOT) of a generated thumbnail file"""
+    return f"thumbnails/{video_id}/{filename}"
+
+
+def frame_score(frame):
+    """How good a poster the frame makes: contrast, ignoring near-black/white frames"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    mean, stddev = cv2.meanStdDev(gray)
+    if not 16 <= mean[0][0] <= 240:
+        return 0.0
+    return float(stddev[0][0])
+
+
+def extract_previews(path, max_tiles=SPRITE_MAX_TILES, tile_width=SPRITE_TILE_WIDTH):
+    """Decode the video once; return ``(tiles, interval, duration, poster_frame)``"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Failed to open video: {path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 0:
+            interval = max(frame_count / fps / max_tiles, 1.0)
+        else:
+            interval = FALLBACK_INTERVAL
+        step = max(int(round(interval * fps)), 1)
+        interval = step / fps
+
+        tiles, poster, best_score, tile_size = [], None, -1.0, None
+        index = 0
+        while len(tiles) < max_tiles:
+            if index % step:
+                # Frames between samples are skipped without converting them
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if tile_size is None:
+                    height, width = frame.shape[:2]
+                    tile_size = (tile_width, max(2 * round(height * tile_width / width / 2), 2))
+                tiles.append(cv2.resize(frame, tile_size, interpolation=cv2.INTER_AREA))
+                score = frame_score(frame)
+                if score > best_score:
+                    poster, best_score = frame, score
+            index += 1
+
+        duration = frame_count / fps if frame_count > 0 else index / fps
+        return tiles, interval, duration, poster
+    finally:
+        cap.release()
+
+
+def build_sprite(tiles, columns=SPRITE_COLUMNS):
+    """Lay tiles out row by row; returns the sheet and each tile's ``(x, y, w, h)``"""
+    tile_height, tile_width = tiles[0].shape[:2]
+    columns = min(columns, len(tiles))
+    rows = math.ceil(len(tiles) / columns)
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+    regions = []
+    for i, tile in enumerate(tiles):
+        x, y = (i % columns) * tile_width, (i // columns) * tile_height
+        sheet[y:y + tile_height, x:x + tile_width] = tile
+        regions.append((x, y, tile_width, tile_height))
+    return sheet, regions
+
+
+def format_timestamp(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def build_vtt(regions, interval, duration, sprite_name):
+    """WebVTT cues pointing at sprite regions; ``sprite_name`` is relative to the VTT file"""
+    lines = ['WEBVTT', '']
+    for i, (x, y, w, h) in enumerate(regions):
+        start = i * interval
+        end = duration if i == len(regions) - 1 else (i + 1) * interval
+        lines.append(f"{format_timestamp(start)} --> {format_timestamp(max(end, start))}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{w},{h}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def _write_image(name, image):
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    quality = getattr(settings, 'THUMBNAIL_QUALITY', 85)
+    if not cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+        raise ValueError(f"Failed to write {path}")
+
+
+def generate_thumbnails(video_id):
+    """Write poster sizes, sprite sheet and WebVTT index for a video"""
+    video = Video.objects.get(id=video_id)
+    try:
+        tiles, interval, duration, poster = extract_previews(video.file_path.path)
+        if not tiles:
+            raise ValueError('No frames could be decoded')
+
+        # A poster uploaded with the video wins over the picked frame
+        uploaded = cv2.imread(video.thumbnail.path) if video.thumbnail else None
+        if uploaded is not None:
+            poster = uploaded
+
+        sizes = {}
+        for size, (max_width, max_height) in getattr(settings, 'THUMBNAIL_SIZES', DEFAULT_THUMBNAIL_SIZES).items():
+            sizes[size] = thumbnails_name(video_id, f"poster_{size}.jpg")
+            _write_image(sizes[size], fit_frame(poster, max_width, max_height))
+
+        sheet, regions = build_sprite(tiles)
+        _write_image(thumbnails_name(video_id, 'sprite.jpg'), sheet)
+        vtt_name = thumbnails_name(video_id, 'sprite.vtt')
+        with open(os.path.join(settings.MEDIA_ROOT, vtt_name), 'w') as f:
+            f.write(build_vtt(regions, interval, duration, 'sprite.jpg'))
+    except Exception as e:
+        logger.error(f"Thumbnail generation failed for video {video_id}: {str(e)}")
+        return
+
+    fields = {'thumbnail_sizes': sizes, 'preview_vtt': vtt_name}
+    if uploaded is None:
+        fields['thumbnail'] = sizes.get(DEFAULT_THUMBNAIL_SIZE) or next(iter(sizes.values()), None)
+    Video.objects.filter(id=video_id).update(**fields)
+    logger.info(f"Generated thumbnails for video {video_id}: {len(sizes)} sizes, {len(regions)} sprite tiles")
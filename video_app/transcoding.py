@@ -0,0 +1,133 @@
+import cv2
+import logging
+import os
+import shutil
+import subprocess
+from django.conf import settings
+from django.utils import timezone
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+# (name, height, video bitrate, audio bitrate)
+DEFAULT_HLS_LADDER = [
+    ('240p', 240, '400k', '64k'),
+    ('480p', 480, '1000k', '96k'),
+    ('720p', 720, '2500k', '128k'),
+]
+SEGMENT_SECONDS = 6
+
+
+def hls_root(video_id):
+    return os.path.join(settings.MEDIA_ROOT, 'hls', str(video_id))
+
+
+def select_ladder(source_height, ladder=None):
+    """Drop renditions taller than the source, keeping at least the smallest"""
+    ladder = ladder or getattr(settings, 'HLS_LADDER', DEFAULT_HLS_LADDER)
+    selected = [rung for rung in ladder if rung[1] <= source_height]
+    return selected or ladder[:1]
+
+
+def probe_source(path):
+    """Return ``(height, fps)`` of the source using OpenCV"""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Failed to open video: {path}")
+        return int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), cap.get(cv2.CAP_PROP_FPS) or 30
+    finally:
+        cap.release()
+
+
+def has_audio(ffprobe, path):
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-select_streams', 'a', '-show_entries', 'stream=index', '-of', 'csv=p=0', path],
+        capture_output=True, text=True, timeout=getattr(settings, 'FFPROBE_TIMEOUT', 60),
+    )
+    return bool(result.stdout.strip())
+
+
+def build_hls_command(ffmpeg, source, output_dir, ladder, fps, audio):
+    """Build one ffmpeg invocation that decodes once and encodes every rendition"""
+    gop = max(int(round(fps * SEGMENT_SECONDS)), 1)
+    splits = ''.join(f'[v{i}]' for i in range(len(ladder)))
+    filters = [f'[0:v]split={len(ladder)}{splits}']
+    filters += [f'[v{i}]scale=-2:{height}[v{i}out]' for i, (_, height, _, _) in enumerate(ladder)]
+
+    command = [ffmpeg, '-y', '-v', 'error', '-i', source, '-filter_complex', ';'.join(filters)]
+    stream_map = []
+    for i, (name, _, video_bitrate, audio_bitrate) in enumerate(ladder):
+        command += [
+            '-map', f'[v{i}out]', f'-c:v:{i}', 'libx264', f'-b:v:{i}', video_bitrate,
+            f'-maxrate:v:{i}', video_bitrate, f'-bufsize:v:{i}', video_bitrate,
+        ]
+        if audio:
+            command += ['-map', '0:a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', audio_bitrate]
+            stream_map.append(f'v:{i},a:{i},name:{name}')
+        else:
+            stream_map.append(f'v:{i},name:{name}')
+
+    # Fixed GOPs keep segment boundaries aligned across renditions
+    command += [
+        '-preset', 'veryfast', '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+        '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'segment_%05d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(stream_map),
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def _set_status(video_id, status, error=''):
+    # update() skips auto_now; updated_at tells how long a job has been processing
+    Video.objects.filter(id=video_id).update(transcode_status=status, transcode_error=error, updated_at=timezone.now())
+
+
+def stale_after():
+    """Seconds after which a video still ``processing`` has lost its job (worker restart)"""
+    return getattr(settings, 'FFPROBE_TIMEOUT', 60) + getattr(settings, 'TRANSCODE_TIMEOUT', 3600)
+
+
+def transcode_video(video_id):
+    """Produce an HLS bitrate ladder for a video and record the job state.
+
+    ffmpeg is killed after ``TRANSCODE_TIMEOUT`` seconds and the video marked
+    failed, so a stuck encode cannot hold a background worker forever.
+    """
+    ffmpeg, ffprobe = shutil.which('ffmpeg'), shutil.which('ffprobe')
+    if not ffmpeg or not ffprobe:
+        _set_status(video_id, Video.TRANSCODE_FAILED, 'ffmpeg is not installed')
+        logger.error("Transcoding skipped: ffmpeg is not installed")
+        return
+
+    video = Video.objects.get(id=video_id)
+    _set_status(video_id, Video.TRANSCODE_PROCESSING)
+    output_dir = hls_root(video_id)
+    try:
+        source = video.file_path.path
+        height, fps = probe_source(source)
+        ladder = select_ladder(height)
+
+        shutil.rmtree(output_dir, ignore_errors=True)
+        for name, *_ in ladder:
+            os.makedirs(os.path.join(output_dir, name), exist_ok=True)
+
+        command = build_hls_command(ffmpeg, source, output_dir, ladder, fps, has_audio(ffprobe, source))
+        result = subprocess.run(command, capture_output=True, text=True, timeout=getattr(settings, 'TRANSCODE_TIMEOUT', 3600))
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip()[-1000:] or f"ffmpeg exited with {result.returncode}")
+    except subprocess.TimeoutExpired as e:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        _set_status(video_id, Video.TRANSCODE_FAILED, f"{os.path.basename(e.cmd[0])} timed out after {e.timeout:g}s")
+        logger.error(f"Transcoding timed out for video {video_id} after {e.timeout:g}s")
+        return
+    except Exception as e:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        _set_status(video_id, Video.TRANSCODE_FAILED, str(e))
+        logger.error(f"Transcoding failed for video {video_id}: {str(e)}")
+        return
+
+    _set_status(video_id, Video.TRANSCODE_READY)
+    logger.info(f"Transcoded video {video_id}: {', '.join(name for name, *_ in ladder)}")
@@ -0,0 +1,181 @@
+"""
+Resumable uploads following the tus 1.0 protocol (core, creation, checksum
+and termination extensions).
+
+A client creates an upload with its total length, then PATCHes chunks at the
+current offset; after a dropped connection it asks for the offset with HEAD and
+continues from there. Chunks are written into the final file under
+``MEDIA_ROOT/videos/``, so nothing is copied when the upload completes and
+becomes a ``Video``.
+
+Under WSGI a chunk is read from the socket straight into that file. Django's
+ASGI handler instead receives the whole request body before calling the view,
+spooling anything over ``FILE_UPLOAD_MAX_MEMORY_SIZE`` to a temporary file, so
+each chunk is on disk twice and the client's progress only shows at the end.
+``UPLOAD_MAX_CHUNK_SIZE`` (advertised as ``Upload-Max-Chunk-Size``) keeps
+those spools small; larger PATCHes are refused with ``413``.
+"""
+import base64
+import binascii
+import fcntl
+import hashlib
+import os
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.utils.text import get_valid_filename
+from .models import Upload, Video
+from .serializers import MAX_VIDEO_SIZE, VALID_VIDEO_EXTENSIONS
+from .tasks import schedule_video_processing
+
+TUS_VERSION = '1.0.0'
+TUS_EXTENSIONS = 'creation,checksum,termination'
+CHECKSUM_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+}
+READ_SIZE = 1024 * 1024
+
+
+def max_chunk_size():
+    return getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+class UploadError(Exception):
+    """A request the upload cannot accept, with the HTTP status to answer"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_metadata(header):
+    """Decode ``Upload-Metadata`` (comma-separated ``key base64value`` pairs)"""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode() if value else ''
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f"Invalid Upload-Metadata value for {key}", 400)
+    return metadata
+
+
+def parse_checksum(header):
+    """Return ``(hash factory, expected digest)`` from ``Upload-Checksum``, or ``None``"""
+    if not header:
+        return None
+    algorithm, _, value = header.strip().partition(' ')
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm: {algorithm}", 400)
+    try:
+        return CHECKSUM_ALGORITHMS[algorithm], base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise UploadError('Invalid Upload-Checksum value', 400)
+
+
+def storage_name(upload_id, filename):
+    """``videos/<upload id>_<filename>``, shortened to fit ``Video.file_path``"""
+    prefix = f"videos/{upload_id.hex}_"
+    stem, ext = os.path.splitext(get_valid_filename(filename))
+    room = Video._meta.get_field('file_path').max_length - len(prefix) - len(ext)
+    return f"{prefix}{stem[:max(room, 0)]}{ext}"
+
+
+def create_upload(user, length, metadata):
+    """Validate the announced upload and reserve its file"""
+    if length < 1:
+        # An empty upload would be complete before any PATCH could finalize it
+        raise UploadError('Upload-Length must be a positive integer', 400)
+    if length > MAX_VIDEO_SIZE:
+        raise UploadError('File size too large. Maximum size is 500MB.', 413)
+    filename = metadata.get('filename', '')
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in VALID_VIDEO_EXTENSIONS:
+        raise UploadError('Unsupported file format. Please upload MP4, AVI, MOV, or MKV files.', 400)
+
+    upload_id = uuid.uuid4()
+    upload = Upload(
+        id=upload_id,
+        user=user,
+        title=(metadata.get('title') or os.path.splitext(filename)[0])[:100],
+        description=metadata.get('description', ''),
+        file_name=storage_name(upload_id, filename),
+        length=length,
+    )
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    open(upload.path, 'wb').close()
+    upload.save()
+    return upload
+
+
+def write_chunk(upload, stream, offset, content_length, checksum=None):
+    """Append one PATCH body at ``offset``; returns the new offset.
+
+    Without a checksum, bytes received before a dropped connection are kept
+    so the client can resume after them. With one, a chunk that does not
+    match is discarded whole.
+    """
+    if content_length > max_chunk_size():
+        raise UploadError(f"Chunks may be at most {max_chunk_size()} bytes", 413)
+    with open(upload.path, 'r+b') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('Another request is writing to this upload', 423)
+        # The offset may have moved while we waited for the request body
+        upload.refresh_from_db(fields=['offset'])
+        if offset != upload.offset:
+            raise UploadError(f"Upload-Offset must be {upload.offset}", 409)
+        if offset + content_length > upload.length:
+            raise UploadError('Chunk exceeds Upload-Length', 413)
+
+        digest = checksum[0]() if checksum else None
+        f.seek(offset)
+        received = 0
+        try:
+            while received < content_length:
+                data = stream.read(min(READ_SIZE, content_length - received))
+                if not data:
+                    break
+                f.write(data)
+                if digest:
+                    digest.update(data)
+                received += len(data)
+        except OSError:
+            if digest:
+                f.truncate(offset)
+                raise UploadError('Connection lost during checksummed chunk', 400)
+
+        if digest and (received != content_length or digest.digest() != checksum[1]):
+            f.truncate(offset)
+            raise UploadError('Checksum mismatch', 460)
+        f.truncate(offset + received)
+
+        upload.offset = offset + received
+        upload.save(update_fields=['offset', 'updated_at'])
+    return upload.offset
+
+
+def finalize_upload(upload):
+    """Turn a complete upload into a ``Video`` and queue its processing"""
+    with transaction.atomic():
+        video = Video.objects.create(
+            title=upload.title,
+            description=upload.description,
+            file_path=upload.file_name,
+            file_size=upload.length,
+            user=upload.user,
+        )
+        upload.video = video
+        upload.save(update_fields=['video', 'updated_at'])
+        schedule_video_processing(video)
+    return video
+
+
+def delete_upload(upload):
+    """Drop an unfinished upload and its partial file"""
+    if upload.video_id is None and os.path.exists(upload.path):
+        os.remove(upload.path)
+    upload.delete()
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VideoViewSet, stream_video, stop_stream
+from .views import VideoViewSet, stream_video, stream_video_async, video_file, hls_file, stop_stream, stream_metrics, upload_create, upload_detail
 
 router = DefaultRouter()
 router.register(r'videos', VideoViewSet, basename='video')
@@ -15,5 +15,11 @@ router.register(r'videos', VideoViewSet, basename='video')
 urlpatterns = [
     path('',include(router.urls)),
     path('videos/<int:video_id>/stream/', stream_video, name='stream-video'),
+    path('videos/<int:video_id>/stream/async/', stream_video_async, name='stream-video-async'),
+    path('videos/<int:video_id>/file/', video_file, name='video-file'),
+    path('videos/<int:video_id>/hls/<path:name>', hls_file, name='video-hls'),
     path('videos/<int:video_id>/stop-stream/', stop_stream, name='stop-stream'),
+    path('uploads/', upload_create, name='upload-create'),
+    path('uploads/<uuid:upload_id>/', upload_detail, name='upload-detail'),
+    path('metrics/', stream_metrics, name='stream-metrics'),
 ]
@@ -0,0 +1,116 @@
+"""
+Buffered view counting.
+
+Plays are counted in process memory and written in one ``F()`` update per
+distinct increment every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds, so opening a
+stream never writes to the database. Repeat plays by the same viewer inside
+``VIEW_DEDUP_WINDOW`` seconds are dropped with an atomic ``cache.add``, which
+holds across workers when the cache is shared (Redis).
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+
+def client_address(request):
+    """The client's address, read from ``X-Forwarded-For`` behind trusted proxies.
+
+    Each of the ``TRUSTED_PROXY_COUNT`` proxies in front of the app appends
+    the address it received the request from, so the client is that many
+    entries from the end; anything before it may be forged by the client.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    forwarded = [a.strip() for a in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if a.strip()]
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def viewer_key(request, user=None, source=None):
+    """Identify the viewer of a request.
+
+    The user id, else the user a signed playback token (``source``) was
+    issued to, else the client address.
+    """
+    user = user if user is not None else getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    if source is not None and source.viewer:
+        return source.viewer
+    return f"addr:{client_address(request)}"
+
+
+class ViewCounter:
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, video_id, viewer):
+        """Count a play unless ``viewer`` already played the video in the window; returns whether it counted"""
+        window = getattr(settings, 'VIEW_DEDUP_WINDOW', 1800)
+        if not cache.add(f"video-view:{video_id}:{viewer}", 1, timeout=window):
+            return False
+        with self._lock:
+            self._pending[video_id] += 1
+            if self._timer is None:
+                self._schedule_flush()
+        return True
+
+    def _schedule_flush(self):
+        self._timer = threading.Timer(getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10), self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self, retry=True):
+        """Write buffered counts; returns the number of plays written"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        if not pending:
+            return 0
+
+        # One UPDATE per distinct increment instead of one per video
+        by_increment = defaultdict(list)
+        for video_id, count in pending.items():
+            by_increment[count].append(video_id)
+        try:
+            with transaction.atomic():
+                for count, video_ids in by_increment.items():
+                    Video.objects.filter(id__in=video_ids).update(views=F('views') + count)
+        except Exception as e:
+            logger.error(f"View count flush failed: {str(e)}")
+            if not retry:
+                return 0
+            # Keep the plays for the next flush
+            with self._lock:
+                for video_id, count in pending.items():
+                    self._pending[video_id] += count
+                if self._timer is None:
+                    self._schedule_flush()
+            return 0
+        return sum(pending.values())
+
+    def pending(self, video_id):
+        with self._lock:
+            return self._pending.get(video_id, 0)
+
+
+view_counter = ViewCounter()
+# Write what is still buffered when the worker shuts down
+atexit.register(view_counter.flush, retry=False)
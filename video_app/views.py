@@ -2,68 +2,109 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.decorators import api_view, permission_classes
-from .streaming import StreamManager
-from django.http import StreamingHttpResponse, HttpResponseServerError, FileResponse
-from django.db.models import Q
-from .models import Video
-from .serializers import VideoSerializer
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from accounts.authentication import StatelessReadJWTAuthentication
+from .streaming import StreamCapacityError, StreamManager, get_profile, lower_profile
+from .backpressure import ViewerPacer
+from .catalog_cache import cache_catalog_response
+from .framepack import FramePackPlayer, open_frame_pack
+from .keyframes import get_keyframe_index
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, bytes_sent_total, render_metrics
+from .ranges import is_asgi, serve_file
+from .search import search_videos
+from .tasks import schedule_video_processing
+from .view_counts import view_counter, viewer_key
+from .transcoding import hls_root
+from .uploads import (
+    CHECKSUM_ALGORITHMS, TUS_EXTENSIONS, TUS_VERSION, UploadError, create_upload, delete_upload, finalize_upload,
+    max_chunk_size, parse_checksum, parse_metadata, write_chunk,
+)
+from django.http import StreamingHttpResponse, HttpResponseServerError, FileResponse, JsonResponse, HttpResponse
+from django.utils._os import safe_join
+from django.core.exceptions import SuspiciousFileOperation
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from .models import Upload, Video
+from .playback import PlaybackDenied, resolve_playback, sign_playback
+from .pagination import VideoCursorPagination, sort_ordering
+from .serializers import MAX_VIDEO_SIZE, VideoListSerializer, VideoSerializer
 import logging
+import math
+import os
 from wsgiref.util import FileWrapper
 from django.conf import settings
+from django.db import connection
 from functools import wraps
+from urllib.parse import urlencode
 
 logger = logging.getLogger(__name__)
 
 class VideoViewSet(viewsets.ModelViewSet):
     serializer_class = VideoSerializer
+    # Reads trust the token's claims; only writes load the user row
+    authentication_classes = [StatelessReadJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = VideoCursorPagination
+
+    def get_serializer_class(self):
+        # Catalog pages use the slim representation with ``?fields=`` support
+        if self.action in ('list', 'my_videos', 'search'):
+            return VideoListSerializer
+        return VideoSerializer
     
     def get_queryset(self):
-        queryset = Video.objects.all()
+        queryset = self.project(Video.objects.all())
         
         # Get query parameters
         search_query = self.request.query_params.get('search', None)
-        sort_by = self.request.query_params.get('sort', 'newest')
 
         # Apply search filter if search query exists
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(user__username__icontains=search_query)
-            )
-
-        # Apply sorting
-        if sort_by == 'newest':
-            queryset = queryset.order_by('-created_at')
-        elif sort_by == 'oldest':
-            queryset = queryset.order_by('created_at')
-        elif sort_by == 'popular':
-            queryset = queryset.order_by('-views')
-        else:
-            queryset = queryset.order_by('-created_at')  
+            queryset = search_videos(queryset, search_query)
 
-        return queryset
+        # Apply sorting (newest, oldest or popular; the paginator pages in the same order)
+        return queryset.order_by(*sort_ordering(self.request))
     
+    @cache_catalog_response()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Save a new video with the requesting user as the owner."""
-        serializer.save(user=self.request.user)
+        # The upload size is known now; the rest of the metadata is probed in the background
+        video = serializer.save(user=self.request.user, file_size=serializer.validated_data['file_path'].size)
+        schedule_video_processing(video)
         logger.info(f"Video created: {serializer.data['title']} by {self.request.user.email}")
     
     @action(detail=False, methods=['get'])
+    @cache_catalog_response()
     def search(self, request):
-        """Search videos by title or description based on the query parameter."""
+        """Search videos by title, description or uploader, best matches first."""
         query = request.query_params.get('q', '')
         if query:
-            videos = Video.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query)
-            )
-            serializer = self.get_serializer(videos, many=True)
-            return Response(serializer.data)
-        return Response([])
+            videos = search_videos(self.project(Video.objects.all()), query)
+            if 'sort' not in request.query_params:
+                self.pagination_ordering = ('-rank', '-id')
+            return self.paginated_response(videos)
+        # Same page shape as every other catalog response
+        return self.paginated_response(Video.objects.none())
     
+    @action(detail=True, methods=['get'])
+    def playback(self, request, pk=None):
+        """Signed stream and file URLs for one viewing session (``?profile=`` picks the stream profile)"""
+        try:
+            profile = get_profile(request.query_params.get('profile'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        video = self.get_object()
+        query = urlencode({'token': sign_playback(video, profile, request.user)})
+        urls = {
+            f"{name}_url": request.build_absolute_uri(f"{reverse(url_name, args=[video.id])}?{query}")
+            for name, url_name in (('stream', 'stream-video'), ('stream_async', 'stream-video-async'), ('file', 'video-file'))
+        }
+        return Response({**urls, 'profile': profile, 'expires_in': getattr(settings, 'PLAYBACK_URL_TTL', 3600)})
+
     # @action(detail=True, methods=['post'])
     # def increment_views(self, request, pk=None):
     #     """increment the view count of a specific video by 1."""
@@ -73,11 +114,25 @@ class VideoViewSet(viewsets.ModelViewSet):
     #     return Response({'views': video.views})
     
     @action(detail=False, methods=['GET'])
+    @cache_catalog_response(per_user=True)
     def my_videos(self, request):
         """Get videos uploaded by the current user"""
-        videos = Video.objects.filter(user=request.user).order_by('-created_at')
-        serializer = self.get_serializer(videos, many=True)
-        return Response(serializer.data)
+        videos = self.project(Video.objects.filter(user_id=request.user.pk))
+        return self.paginated_response(videos)
+
+    def project(self, queryset):
+        """Join the uploader and load only the columns the response renders"""
+        queryset = queryset.select_related('user')
+        serializer_class = self.get_serializer_class()
+        if serializer_class is VideoListSerializer:
+            # The paginator reads the sort keys of page edges to build cursors
+            return queryset.only(*self.get_serializer().columns(), 'created_at', 'views')
+        return queryset.defer('search_vector')
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 def with_stream_cleanup(view_func):
     """Decorator to ensure stream cleanup"""
@@ -94,39 +149,196 @@ def with_stream_cleanup(view_func):
                     logger.error(f"Cleanup error: {str(e)}")
     return wrapper
 
+def parse_start_position(params):
+    """Read a viewer's ``?t=`` (seconds) or ``?frame=`` start position"""
+    if 't' in params:
+        seconds = float(params['t'])
+        if not math.isfinite(seconds) or seconds < 0:
+            raise ValueError('t must be a non-negative number of seconds')
+        return {'start_time': seconds}
+    if 'frame' in params:
+        frame = int(params['frame'])
+        if frame < 0:
+            raise ValueError('frame must be a non-negative integer')
+        return {'start_frame': frame}
+    return {}
+
+def open_stream_source(source, start):
+    """Pick where one viewer's frames come from.
+
+    Frame packs are read directly. A viewer with a start position gets a
+    private stream that opens at the nearest keyframe; everyone else shares
+    the video's live stream for the requested profile.
+    """
+    video_id, path, fps, profile = source.video_id, source.path, source.fps, source.profile
+    pack = open_frame_pack(video_id, profile)
+    if pack is not None:
+        if 'start_time' in start:
+            index = pack.index_at(start['start_time'])
+        else:
+            index = min(start.get('start_frame', 0), max(len(pack) - 1, 0))
+        return FramePackPlayer(pack, start_index=index)
+
+    stream_manager = StreamManager.get_instance()
+    if start:
+        # Without an index (not built yet) the stream seeks to the exact time
+        keyframes = get_keyframe_index(video_id)
+        return stream_manager.open_private_stream(
+            video_id, path, profile, keyframes=keyframes, fps=fps, **start
+        )
+    return stream_manager.get_stream(video_id, path, profile, fps=fps)
+
+def release_stream_source(stream):
+    """Drop a viewer from a managed stream, or close a frame pack player"""
+    if getattr(stream, 'key', None) is not None:
+        StreamManager.get_instance().release_stream(stream.key)
+    elif isinstance(stream, FramePackPlayer):
+        stream.close()
+
+def release_db_connection():
+    """Give the request's database connection back before a long-lived response.
+
+    Streams and downloads can run for minutes without touching the ORM, so
+    holding a connection (or pool slot) for them would tie Postgres
+    connections to viewers rather than to API traffic. Inside a transaction
+    the connection is still in use and is kept.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+def downgrade_stream(stream, source):
+    """Move a slow viewer of a shared live stream to the next lower profile.
+
+    Returns ``(stream, source)``, unchanged for private and frame pack streams,
+    at the lowest profile, or when no stream slot is free.
+    """
+    profile = lower_profile(source.profile)
+    if profile is None or getattr(stream, 'key', None) is None or getattr(stream, 'private', False):
+        return stream, source
+    lower = source._replace(profile=profile)
+    try:
+        lower_stream = open_stream_source(lower, {})
+    except StreamCapacityError:
+        return stream, source
+    release_stream_source(stream)
+    logger.info(f"Slow viewer of video {source.video_id} moved to profile {profile}")
+    return lower_stream, lower
+
+def count_sent(stream, chunk):
+    """Add a chunk written to a viewer to the stream and process byte counters"""
+    bytes_sent_total.inc(len(chunk))
+    if getattr(stream, 'bytes_sent', None) is not None:
+        stream.bytes_sent.inc(len(chunk))
+
+def mjpeg_part(frame):
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+
+def mjpeg_frames(stream, source):
+    """Multipart MJPEG body for one viewer, paced to how fast it is delivered"""
+    cursor, pacer = None, None
+    try:
+        while True:
+            if pacer is not None:
+                cursor = pacer.catch_up(cursor, getattr(stream, 'latest_seq', None))
+            cursor, frame = stream.get_frame(cursor)
+            if frame:
+                pacer = pacer or ViewerPacer(stream.fps)
+                if not pacer.due():
+                    continue
+                chunk = mjpeg_part(frame)
+                count_sent(stream, chunk)
+                pacer.sending()
+                yield chunk
+                # Resumed once the server has written the chunk to the socket
+                if pacer.delivered():
+                    lower, source = downgrade_stream(stream, source)
+                    if lower is not stream:
+                        stream, cursor, pacer = lower, None, None
+            else:
+                logger.warning('Frame not available')
+                break
+    except Exception as e:
+        logger.error(f"Frame generator error: {str(e)}")
+    finally:
+        try:
+            release_stream_source(stream)
+        except Exception as e:
+            logger.error(f"Stream cleanup error: {str(e)}")
+
+async def mjpeg_frames_async(stream, source):
+    """Awaitable version of :func:`mjpeg_frames`"""
+    cursor, pacer = None, None
+    try:
+        while True:
+            if pacer is not None:
+                cursor = pacer.catch_up(cursor, getattr(stream, 'latest_seq', None))
+            cursor, frame = await stream.get_frame_async(cursor)
+            if frame:
+                pacer = pacer or ViewerPacer(stream.fps)
+                if not pacer.due():
+                    continue
+                chunk = mjpeg_part(frame)
+                count_sent(stream, chunk)
+                pacer.sending()
+                yield chunk
+                # Resumed once the ASGI server has flushed the chunk (flow control)
+                if pacer.delivered():
+                    lower, source = await sync_to_async(downgrade_stream, thread_sensitive=False)(stream, source)
+                    if lower is not stream:
+                        stream, cursor, pacer = lower, None, None
+            else:
+                logger.warning('Frame not available')
+                break
+    except Exception as e:
+        logger.error(f"Frame generator error: {str(e)}")
+    finally:
+        try:
+            await sync_to_async(release_stream_source, thread_sensitive=False)(stream)
+        except Exception as e:
+            logger.error(f"Stream cleanup error: {str(e)}")
+
+def frame_iterator(request, stream, source):
+    """The MJPEG body in the form the serving handler streams.
+
+    Django's ASGI handler drains a synchronous iterator into a list before
+    sending anything, which never finishes for a live stream, so ASGI gets
+    the async generator; WSGI servers iterate the sync one chunk by chunk.
+    """
+    if is_asgi(request):
+        return mjpeg_frames_async(stream, source)
+    return mjpeg_frames(stream, source)
+
 @api_view(['GET'])
+@authentication_classes([StatelessReadJWTAuthentication])
 @with_stream_cleanup
 def stream_video(request, video_id):
-    """Stream video using OpenCV"""
+    """Stream video using OpenCV.
+
+    ``?profile=`` picks the output size/quality, ``?t=`` (seconds) or
+    ``?frame=`` the start position. With the ``?token=`` of a signed playback
+    URL the video is not looked up at all.
+    """
     stream = None
     try:
-        video = Video.objects.get(id=video_id)
-        stream_manager = StreamManager.get_instance()
-        stream = stream_manager.get_stream(video_id, video.file_path.path)
-        
-        def frame_generator():
-            try:
-                while True:
-                    frame = stream.get_frame()
-                    if frame:
-                        # print('frame add and sending')
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-                    else:
-                        logger.warning('Frame not available')
-                        break
-            except Exception as e:
-                logger.error(f"Frame generator error: {str(e)}")
-            finally:
-                try:
-                    stream_manager.release_stream(video_id)
-                except Exception as e:
-                    logger.error(f"Stream cleanup error: {str(e)}")
+        profile = get_profile(request.query_params.get('profile'))
+        start = parse_start_position(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
+    try:
+        source = resolve_playback(request, video_id, profile)
+        stream = open_stream_source(source, start)
+        view_counter.record(video_id, viewer_key(request, source=source))
+        # All ORM work is done; frames are served without the database
+        release_db_connection()
+        
         response = StreamingHttpResponse(
-            frame_generator(),
+            frame_iterator(request, stream, source),
             content_type='multipart/x-mixed-replace; boundary=frame'
         )
+        if start:
+            response['X-Stream-Start'] = f"{stream.start_position:.3f}"
         
         # Add CORS headers
         # response["Access-Control-Allow-Origin"] = "*"
@@ -137,21 +349,201 @@ def stream_video(request, video_id):
 
     except Video.DoesNotExist:
         return Response({'error': 'Video not found'}, status=404)
+    except PlaybackDenied as e:
+        return Response({'error': str(e)}, status=403)
+    except StreamCapacityError as e:
+        return Response({'error': str(e)}, status=503, headers={'Retry-After': str(e.retry_after)})
     except Exception as e:
         logger.error(f"Streaming error: {str(e)}")
         if stream:
             try:
-                stream_manager.release_stream(video_id)
+                release_stream_source(stream)
             except Exception as cleanup_error:
                 logger.error(f"Cleanup error: {str(cleanup_error)}")
         return Response({'error': str(e)}, status=500)
 
+@api_view(['GET'])
+@authentication_classes([StatelessReadJWTAuthentication])
+def video_file(request, video_id):
+    """Serve the original upload with HTTP Range support for progressive playback"""
+    try:
+        path = resolve_playback(request, video_id, None).path
+        release_db_connection()
+        return serve_file(request, path)
+    except Video.DoesNotExist:
+        return Response({'error': 'Video not found'}, status=404)
+    except PlaybackDenied as e:
+        return Response({'error': str(e)}, status=403)
+    except (FileNotFoundError, ValueError):
+        return Response({'error': 'Video file not found'}, status=404)
+
+HLS_CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+@api_view(['GET'])
+@authentication_classes([StatelessReadJWTAuthentication])
+def hls_file(request, video_id, name):
+    """Serve the HLS manifest and segments produced by the transcoding pipeline"""
+    content_type = HLS_CONTENT_TYPES.get(os.path.splitext(name)[1])
+    try:
+        if content_type is None:
+            raise FileNotFoundError(name)
+        return serve_file(request, safe_join(hls_root(video_id), name), content_type)
+    except (FileNotFoundError, SuspiciousFileOperation):
+        return Response({'error': 'Not found'}, status=404)
+
+@require_GET
+async def stream_video_async(request, video_id):
+    """Stream video from an async generator when served over ASGI.
+
+    Viewers await new frames on the event loop instead of holding a worker
+    thread, so one process can keep many slow or idle viewers open.
+    """
+    try:
+        profile = get_profile(request.GET.get('profile'))
+        start = parse_start_position(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        source = await sync_to_async(resolve_playback)(request, video_id, profile)
+    except Video.DoesNotExist:
+        return JsonResponse({'error': 'Video not found'}, status=404)
+    except PlaybackDenied as e:
+        return JsonResponse({'error': str(e)}, status=403)
+
+    try:
+        stream = await sync_to_async(open_stream_source, thread_sensitive=False)(source, start)
+    except StreamCapacityError as e:
+        response = JsonResponse({'error': str(e)}, status=503)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        logger.error(f"Streaming error: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+    viewer = viewer_key(request, await request.auser(), source)
+    await sync_to_async(view_counter.record, thread_sensitive=False)(video_id, viewer)
+    await sync_to_async(release_db_connection)()
+
+    response = StreamingHttpResponse(
+        frame_iterator(request, stream, source),
+        content_type='multipart/x-mixed-replace; boundary=frame'
+    )
+    if start:
+        response['X-Stream-Start'] = f"{stream.start_position:.3f}"
+    return response
+
 @api_view(['POST'])
 def stop_stream(request, video_id):
     """Stop video stream"""
     try:
-        StreamManager.get_instance().release_stream(video_id)
+        profile = get_profile(request.query_params.get('profile'))
+        StreamManager.get_instance().release_stream((video_id, profile))
         return Response({'status': 'success'})
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error stopping stream: {str(e)}")
         return Response({'error': str(e)}, status=500)
+
+@require_GET
+def stream_metrics(request):
+    """Prometheus metrics for the streams open in this worker process"""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return HttpResponse(render_metrics(StreamManager.get_instance()), content_type=METRICS_CONTENT_TYPE)
+
+def tus_response(data=None, status=204, **headers):
+    return Response(data, status=status, headers={'Tus-Resumable': TUS_VERSION, **headers})
+
+@api_view(['POST', 'OPTIONS'])
+@permission_classes([IsAuthenticated])
+def upload_create(request):
+    """Start a resumable upload; the body is sent afterwards with PATCH to ``Location``.
+
+    ``Upload-Length`` gives the total size and ``Upload-Metadata`` the
+    base64-encoded ``filename`` (required), ``title`` and ``description``.
+    """
+    if request.method == 'OPTIONS':
+        return tus_response(**{
+            'Tus-Version': TUS_VERSION,
+            'Tus-Extension': TUS_EXTENSIONS,
+            'Tus-Max-Size': str(MAX_VIDEO_SIZE),
+            'Tus-Checksum-Algorithm': ','.join(CHECKSUM_ALGORITHMS),
+            'Upload-Max-Chunk-Size': str(max_chunk_size()),
+        })
+    try:
+        length = int(request.headers.get('Upload-Length', ''))
+        upload = create_upload(request.user, length, parse_metadata(request.headers.get('Upload-Metadata')))
+    except ValueError:
+        return tus_response({'error': 'Upload-Length must be a positive integer'}, status=400)
+    except UploadError as e:
+        return tus_response({'error': str(e)}, status=e.status)
+
+    location = request.build_absolute_uri(reverse('upload-detail', args=[upload.id]))
+    logger.info(f"Upload started: {upload.title} ({upload.length} bytes) by {request.user.email}")
+    return tus_response(
+        {'id': str(upload.id)}, status=201, Location=location, **{'Upload-Max-Chunk-Size': str(max_chunk_size())}
+    )
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_detail(request, upload_id):
+    """Offset (HEAD), next chunk (PATCH), status (GET) or cancellation (DELETE) of an upload.
+
+    Under ASGI Django has already spooled the PATCH body to a temporary file
+    by the time this runs (see ``uploads``); chunks over
+    ``UPLOAD_MAX_CHUNK_SIZE`` are refused so that spool stays small.
+    """
+    try:
+        upload = Upload.objects.get(id=upload_id, user=request.user)
+    except Upload.DoesNotExist:
+        return tus_response({'error': 'Upload not found'}, status=404)
+
+    if request.method == 'HEAD':
+        return tus_response(status=200, **{
+            'Upload-Offset': str(upload.offset),
+            'Upload-Length': str(upload.length),
+            'Cache-Control': 'no-store',
+        })
+    if request.method == 'GET':
+        return tus_response({
+            'id': str(upload.id),
+            'title': upload.title,
+            'offset': upload.offset,
+            'length': upload.length,
+            'video': upload.video_id,
+        }, status=200)
+    if request.method == 'DELETE':
+        delete_upload(upload)
+        return tus_response()
+
+    if request.content_type != 'application/offset+octet-stream':
+        return tus_response({'error': 'Content-Type must be application/offset+octet-stream'}, status=415)
+    if upload.video_id is not None:
+        return tus_response({'error': 'Upload is already complete'}, status=409)
+    # A complete upload without a video failed to finalize; the next PATCH retries it
+    if not upload.is_complete:
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            content_length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return tus_response({'error': 'Upload-Offset must be an integer'}, status=400)
+
+        try:
+            checksum = parse_checksum(request.headers.get('Upload-Checksum'))
+            # The raw body: the socket under WSGI, Django's spooled copy under ASGI
+            write_chunk(upload, request.stream, offset, content_length, checksum)
+        except UploadError as e:
+            return tus_response({'error': str(e)}, status=e.status, **{'Upload-Offset': str(upload.offset)})
+        except FileNotFoundError:
+            return tus_response({'error': 'Upload file is missing'}, status=410)
+
+    if upload.is_complete:
+        video = finalize_upload(upload)
+        logger.info(f"Upload completed: video {video.id} by {request.user.email}")
+    return tus_response(**{'Upload-Offset': str(upload.offset)})
@@ -15,6 +15,7 @@ from datetime import timedelta
 
 import os
 from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
@@ -39,7 +40,10 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_METHODS = [
     'GET',
+    'HEAD',
     'POST',
+    'PATCH',
+    'DELETE',
     'OPTIONS',
 ]
 
@@ -52,6 +56,25 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    # Resumable (tus) uploads
+    'tus-resumable',
+    'upload-length',
+    'upload-offset',
+    'upload-metadata',
+    'upload-checksum',
+]
+
+# Response headers the frontend's tus client has to read
+CORS_EXPOSE_HEADERS = [
+    'location',
+    'tus-resumable',
+    'tus-version',
+    'tus-extension',
+    'tus-max-size',
+    'tus-checksum-algorithm',
+    'upload-offset',
+    'upload-length',
+    'upload-max-chunk-size',
 ]
 
 # Application definition
@@ -62,6 +85,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "corsheaders",
     'rest_framework',
     'rest_framework_simplejwt',
@@ -72,8 +96,13 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
+    # Token buckets for login/registration: size and refill per period
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_RATE', '20/min'),
+        'auth_email': os.getenv('AUTH_EMAIL_RATE', '5/min'),
+    },
 }
 
 
@@ -116,6 +145,17 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Connections are reused from a psycopg pool (Django closes them into it
+        # after each request), so CONN_MAX_AGE stays 0
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+                'check': ConnectionPool.check_connection,
+            },
+        },
     }
 }
 
@@ -179,6 +219,64 @@ SIMPLE_JWT = {
 }
 
 AUTH_USER_MODEL = 'accounts.User'
+# Seconds an authenticated user row is reused from process memory instead of queried
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+# Most users kept per process; expired and then the oldest entries are dropped
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+# Threads that hash passwords, and how many hashes may wait or run before logins get a 503
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '16'))
+
+
+# Cache: Redis when REDIS_URL is set (shared by all workers), else per-process memory
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Seconds a cached catalog page may lag behind view counts and processing updates
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '60'))
+
+
+# Video streaming
+# Decode each video once per host and share frames between worker processes
+STREAM_SHARED_MEMORY = os.getenv('STREAM_SHARED_MEMORY', 'False') == 'True'
+# Pre-encode MJPEG frame packs at upload so playback does no OpenCV work
+FRAME_PACKS_ENABLED = os.getenv('FRAME_PACKS_ENABLED', 'False') == 'True'
+# Seconds an unwatched stream stays open for reconnecting viewers
+STREAM_IDLE_GRACE = int(os.getenv('STREAM_IDLE_GRACE', '15'))
+# Streams open at once per process; beyond this new streams get a 503
+STREAM_MAX_ACTIVE = int(os.getenv('STREAM_MAX_ACTIVE', '16'))
+STREAM_RETRY_AFTER = int(os.getenv('STREAM_RETRY_AFTER', '5'))
+# Slow viewers get fewer frames, down to this rate, before a lower profile
+STREAM_MIN_VIEWER_FPS = int(os.getenv('STREAM_MIN_VIEWER_FPS', '5'))
+# Plays are buffered and written every VIEW_COUNT_FLUSH_INTERVAL seconds;
+# repeat plays by one viewer within VIEW_DEDUP_WINDOW seconds count once
+VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', '10'))
+VIEW_DEDUP_WINDOW = int(os.getenv('VIEW_DEDUP_WINDOW', '1800'))
+# Proxies in front of the app (1 on Railway); viewers are told apart by the
+# X-Forwarded-For entry they add instead of the proxy's REMOTE_ADDR
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+# Lifetime of signed playback URLs; with PLAYBACK_SIGNED_ONLY streams and files need one
+PLAYBACK_URL_TTL = int(os.getenv('PLAYBACK_URL_TTL', '3600'))
+PLAYBACK_SIGNED_ONLY = os.getenv('PLAYBACK_SIGNED_ONLY', 'False') == 'True'
+# Largest tus PATCH accepted; under ASGI each chunk is spooled before it is written
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', str(8 * 1024 * 1024)))
+# Seconds ffprobe may spend listing a video's keyframes after upload, and
+# the limits on ffprobe/ffmpeg during HLS transcoding (the video is marked failed)
+KEYFRAME_PROBE_TIMEOUT = int(os.getenv('KEYFRAME_PROBE_TIMEOUT', '120'))
+FFPROBE_TIMEOUT = int(os.getenv('FFPROBE_TIMEOUT', '60'))
+TRANSCODE_TIMEOUT = int(os.getenv('TRANSCODE_TIMEOUT', '3600'))
+# Addresses allowed to scrape /api/metrics/
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
 
 
 